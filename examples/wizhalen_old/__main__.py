@@ -20,17 +20,20 @@ from examples.wizhalen_old.components import (
 
 from mergic import (
     ActionController,
+    ActionSet,
     GameWorld,
     SceneManager,
     Scene,
     TextMenu,
 )
 from mergic.asset import AssetFinder
+from mergic.presenter import DisplayPresenter
 from mergic.ui import (
     MenuUICursor,
     MenuUICursorStyle,
     MenuUIHighlightStyle,
     MenuUI,
+    MenuUIAction,
     MenuUIPageIndicatorStyle,
     TextInputUI,
 )
@@ -71,8 +74,11 @@ def load_localized_texts(language_code="en"):
 
 
 class SoundTestScene(Scene):
-    def setup(self):
+    def preload(self, report_progress):
         self.font = asset_finder.load_font("font")
+        report_progress(1.0)
+
+    def setup(self):
         self.font.size = 12
         self.font.fgcolor = pygame.color.Color(200, 200, 222)
         menu = TextMenu()
@@ -140,12 +146,15 @@ class TestMenuScene(Scene):
         menucursor.set_render_position(MenuUICursorStyle.LEFT)
         self.menuui = MenuUI(menu, self.font, menucursor)
         self.menuui.focus()
+        self.menuui.bind_controls(self.manager.input)
         pygame.key.set_repeat(111, 111)
 
-    def handle_event(self, event: Event):
-        self.menuui.handle_event(event)
+    def cleanup(self):
+        for action in MenuUIAction:
+            self.manager.input.unbind(action)
 
     def update(self, dt):
+        self.menuui.handle_input(self.manager.input.snapshot)
         self.screen.blit(self.menuui.render(), (0, 0))
 
 
@@ -162,9 +171,7 @@ class TitleScene(Scene):
         menu = TextMenu()
         menu.add_option(
             "Sound Test",
-            callback=lambda: self.manager.change_scene(
-                "sound_test", block_events_until_setup_finished=pygame.KEYDOWN
-            ),
+            callback=lambda: self.manager.change_scene("sound_test", wait=False),
         )
         menu.add_option(
             "Battle Emulator",
@@ -181,17 +188,29 @@ class TitleScene(Scene):
         self.menuui = MenuUI(menu, self.font, menucursor)
         self.menuui.focus()
         pygame.key.set_repeat(111, 111)
+        self.drawn_selector: Optional[int] = None
+        self.dirty_rects: list[pygame.Rect] = []
 
     def handle_event(self, event: Event):
         self.menuui.handle_event(event)
 
     def update(self, dt):
-        self.screen.fill((0, 0, 0))
+        if self.drawn_selector == self.menuui.menu.selector:
+            return
+        if self.drawn_selector is None:
+            self.screen.fill((0, 0, 0))
         # self.screen.blit(
         #     self.title_surface,
         #     (self.title_pos[0], self.title_pos[1] // 2),
         # )
-        self.screen.blit(self.menuui.render(), (0, self.title_pos[1] // 2 + 1))
+        self.drawn_selector = self.menuui.menu.selector
+        self.dirty_rects.append(
+            self.screen.blit(self.menuui.render(), (0, self.title_pos[1] // 2 + 1))
+        )
+
+    def take_dirty_rects(self):
+        dirty_rects, self.dirty_rects = self.dirty_rects, []
+        return dirty_rects
 
 
 class BattleEmulationScene(Scene):
@@ -250,6 +269,11 @@ class BattleEmulationScene(Scene):
         )
 
 
+PLAYER_ACTIONS = ActionSet(("tile_movement_x", "tile_movement_y"))
+TILE_MOVEMENT_X = PLAYER_ACTIONS["tile_movement_x"]
+TILE_MOVEMENT_Y = PLAYER_ACTIONS["tile_movement_y"]
+
+
 class GameScene(Scene):
     def setup(self):
         self.world = GameWorld()
@@ -259,45 +283,48 @@ class GameScene(Scene):
             pos=Vector2(0, 0),
             surface=player_surf,
             vel=Vector2(0, 0),
-            actions=ActionController(),
+            actions=ActionController(PLAYER_ACTIONS),
         )
         player.actions.add_action("tile_movement_x", {})
         player.actions.add_action("tile_movement_y", {})
         self.world.add(player)
+        self.manager.input.bind_key("move_left", pygame.K_LEFT)
+        self.manager.input.bind_key("move_right", pygame.K_RIGHT)
+        self.manager.input.bind_key("move_up", pygame.K_UP)
+        self.manager.input.bind_key("move_down", pygame.K_DOWN)
 
     def update(self, dt):
         self.screen.fill((0, 0, 0))
-        scancode_map = pygame.key.get_pressed()
+        snapshot = self.manager.input.snapshot
+        vel_x = snapshot.axis("move_left", "move_right")
+        vel_y = snapshot.axis("move_up", "move_down")
         for entity in self.world.entities_for_components(
             HasCoordinate, HasVelocity, HasSurface, HasActions
         ):
             if isinstance(entity, Player):
-                vel_x = scancode_map[pygame.K_RIGHT] - scancode_map[pygame.K_LEFT]
-                vel_y = scancode_map[pygame.K_DOWN] - scancode_map[pygame.K_UP]
-                print("vx, vy", vel_x, vel_y)
                 if vel_x != 0:
-                    if not entity.actions.is_active("tile_movement_x"):
-                        entity.actions.do("tile_movement_x")
+                    if not entity.actions.is_active_id(TILE_MOVEMENT_X):
+                        entity.actions.do_id(TILE_MOVEMENT_X)
                         entity.vel.x = vel_x
                 else:
-                    if not entity.actions.is_active("tile_movement_x"):
+                    if not entity.actions.is_active_id(TILE_MOVEMENT_X):
                         entity.vel.x = vel_x
-                if entity.actions.is_active("tile_movement_x"):
+                if entity.actions.is_active_id(TILE_MOVEMENT_X):
                     entity.pos.x += 16 * entity.vel.x * dt / 1000
                     if round(entity.pos.x % 16) == 0:
-                        entity.actions.cancel("tile_movement_x")
+                        entity.actions.cancel_id(TILE_MOVEMENT_X)
 
                 if vel_y != 0:
-                    if not entity.actions.is_active("tile_movement_y"):
-                        entity.actions.do("tile_movement_y")
+                    if not entity.actions.is_active_id(TILE_MOVEMENT_Y):
+                        entity.actions.do_id(TILE_MOVEMENT_Y)
                         entity.vel.y = vel_y
                 else:
-                    if not entity.actions.is_active("tile_movement_y"):
+                    if not entity.actions.is_active_id(TILE_MOVEMENT_Y):
                         entity.vel.y = vel_y
-                if entity.actions.is_active("tile_movement_y"):
+                if entity.actions.is_active_id(TILE_MOVEMENT_Y):
                     entity.pos.y += 16 * entity.vel.y * dt / 1000
                     if round(entity.pos.y % 16) == 0:
-                        entity.actions.cancel("tile_movement_y")
+                        entity.actions.cancel_id(TILE_MOVEMENT_Y)
             self.screen.blit(entity.surface, entity.pos)
 
 
@@ -306,8 +333,7 @@ def main():
     clock = pygame.time.Clock()
     screen_size = [640, 360]
     px_scale = 2
-    display = pygame.display.set_mode(screen_size)
-    pygame.display.set_caption("Wizahlen")
+    presenter = DisplayPresenter(screen_size, "Wizahlen")
     screen = pygame.surface.Surface([size // px_scale for size in screen_size])
     scene_manager = SceneManager()
     scene_manager.add(TitleScene(screen), "title")
@@ -318,16 +344,16 @@ def main():
     running = True
     dt = 0
     while running:
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        scene_manager.input.update(events)
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             scene_manager.handle_event(event)
         scene_manager.update(dt)
-        pygame.transform.scale(
-            screen, screen_size, display
-        )  # 3rd argument does display.blit()
-        pygame.display.flip()
+        presenter.present(screen, scene_manager.take_dirty_rects())
         dt = clock.tick(FPS)  # milliseconds
+    scene_manager.shutdown()
     pygame.quit()
 
 
@@ -1,6 +1,9 @@
 from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import takewhile
 from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
     Generator,
@@ -11,85 +14,1014 @@ from typing import (
     Type,
     TypeVar,
 )
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 import os
+import threading
+import time
+import warnings
 
 import pygame
 import pygame.freetype
 
 from mergic.gamemap import TileMap
+from mergic.input import InputMapper
+from mergic.spatial import SpatialHash
+from mergic.system import SystemScheduler
 
+if TYPE_CHECKING:
+    from mergic.soa import ComponentArrays
+
+
+class EntityStore[T]:
+    """Entities of a single type with O(1) membership tests and removal.
+
+    Membership is by identity. Iteration follows insertion order until the first removal.
+    By default `remove` moves the last entity into the freed position (swap-remove),
+    so the order of the remaining entities is not preserved.
+    With `stable_order=True` the remaining entities keep their insertion order instead,
+    which costs O(n) per `remove` but still only O(n) per batch in `remove_many`.
+    """
+
+    def __init__(self, stable_order: bool = False):
+        self.stable_order = stable_order
+        self._entities: list[T] = []
+        self._positions: dict[int, int] = {}  # id(entity): index in self._entities
+        self.arrays: Optional["ComponentArrays"] = None  # see ECS.declare_numeric_components
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __iter__(self):
+        return iter(self._entities)
+
+    def __getitem__(self, index: int) -> T:
+        return self._entities[index]
+
+    def __contains__(self, entity: object) -> bool:
+        return id(entity) in self._positions
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._entities!r})"
+
+    def append(self, entity: T):
+        self._positions[id(entity)] = len(self._entities)
+        self._entities.append(entity)
+        if self.arrays is not None:
+            self.arrays.append(entity)
+
+    def extend(self, entities: Iterable[T]):
+        for entity in entities:
+            self.append(entity)
+
+    def remove(self, entity: T):
+        position = self._positions.pop(id(entity), None)
+        if position is None:
+            raise ValueError(f"{entity!r} is not in the store")
+        if self.stable_order:
+            del self._entities[position]
+            for index in range(position, len(self._entities)):
+                self._positions[id(self._entities[index])] = index
+            if self.arrays is not None:
+                self.arrays.delete_rows((position,))
+            return
+        if self.arrays is not None:
+            self.arrays.swap_remove(position)
+        last_entity = self._entities.pop()
+        if last_entity is not entity:
+            self._entities[position] = last_entity
+            self._positions[id(last_entity)] = position
+
+    def remove_many(self, entities: Iterable[T]):
+        if not self.stable_order:
+            for entity in entities:
+                self.remove(entity)
+            return
+        dead_ids = set()
+        for entity in entities:
+            if id(entity) not in self._positions:
+                raise ValueError(f"{entity!r} is not in the store")
+            dead_ids.add(id(entity))
+        if self.arrays is not None:
+            self.arrays.delete_rows(self._positions[dead_id] for dead_id in dead_ids)
+        self._entities = [
+            entity for entity in self._entities if id(entity) not in dead_ids
+        ]
+        self._positions = {
+            id(entity): index for index, entity in enumerate(self._entities)
+        }
+
+
+HANDLE_INDEX_BITS = 32
+HANDLE_INDEX_MASK = (1 << HANDLE_INDEX_BITS) - 1
+
+
+def handle_index(handle: int) -> int:
+    return handle & HANDLE_INDEX_MASK
+
+
+def handle_generation(handle: int) -> int:
+    return handle >> HANDLE_INDEX_BITS
+
+
+@dataclass
+class Prefab[T]:
+    """
+    Template for spawning entities of `entity_type` with `ECS.spawn`.
+
+    Attributes:
+        values: Field values shared by every spawned entity, such as numbers, strings and surfaces.
+        factories: Field name: zero-argument callable creating a fresh value per entity.
+            Use this for mutable values like containers, `Vector2` and `ActionController`.
+    """
+
+    entity_type: type[T]
+    values: dict[str, Any] = field(default_factory=dict)
+    factories: dict[str, Callable[[], Any]] = field(default_factory=dict)
+
+    def instantiate(self, **overrides) -> T:
+        kwargs = self.values | overrides
+        for name, factory in self.factories.items():
+            if name not in overrides:
+                kwargs[name] = factory()
+        return self.entity_type(**kwargs)
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0  # acquisitions served by a recycled entity
+    misses: int = 0  # acquisitions that had to create a new entity
+    released: int = 0  # deleted entities kept for reuse
+    discarded: int = 0  # deleted entities dropped because the pool was full
+    size: int = 0  # entities currently waiting for reuse
+
+
+class EntityPool[T]:
+    """Keeps deleted entities of `entity_type` for reuse.
+
+    `reset(entity, **kwargs)` must put a recycled entity into the same state as `entity_type(**kwargs)` would.
+    """
+
+    def __init__(
+        self,
+        entity_type: type[T],
+        reset: Callable[..., None],
+        max_size: int = 1024,
+    ):
+        self.entity_type = entity_type
+        self.reset = reset
+        self.max_size = max_size
+        self.free: list[T] = []
+        self.stats = PoolStats()
+
+    def acquire(self, **kwargs) -> T:
+        if self.free:
+            entity = self.free.pop()
+            self.reset(entity, **kwargs)
+            self.stats.hits += 1
+        else:
+            entity = self.entity_type(**kwargs)
+            self.stats.misses += 1
+        self.stats.size = len(self.free)
+        return entity
+
+    def release(self, entity: T):
+        if len(self.free) < self.max_size:
+            self.free.append(entity)
+            self.stats.released += 1
+        else:
+            self.stats.discarded += 1
+        self.stats.size = len(self.free)
+
+
+class CommandBuffer:
+    """Structural changes recorded while iterating entities, applied later by `ECS.apply_commands`."""
 
-class ECS:
     def __init__(self):
-        self.entities: dict[type, list[object]] = {}
-        self.dead_entity_buffer: list[object] = []
+        self.spawns: list[object] = []
+        self.replacements: dict[int, tuple[object, object]] = {}  # id(entity): (entity, new entity)
+        self.deletes: dict[int, object] = {}  # id(entity): entity
+
+    def __len__(self) -> int:
+        return len(self.spawns) + len(self.replacements) + len(self.deletes)
+
+    def spawn(self, entity: object):
+        self.spawns.append(entity)
+
+    def replace(self, entity: object, new_entity: object):
+        self.replacements[id(entity)] = (entity, new_entity)
+
+    def delete(self, entity: object):
+        self.deletes[id(entity)] = entity
+
+    def clear(self):
+        self.spawns.clear()
+        self.replacements.clear()
+        self.deletes.clear()
+
+
+@dataclass
+class QueryStats:
+    calls: int = 0
+    total_time_ns: int = 0  # from each call until its generator is exhausted or closed, including the caller's loop body
+    entities_yielded: int = 0
+
+
+@dataclass
+class ECSStats:
+    queries: dict[tuple, QueryStats] = field(
+        default_factory=dict
+    )  # (component types, without, optional): stats
+    adds: dict[type, int] = field(default_factory=dict)  # in the current frame
+    deletes: dict[type, int] = field(default_factory=dict)  # in the current frame
+    last_frame_adds: dict[type, int] = field(default_factory=dict)
+    last_frame_deletes: dict[type, int] = field(default_factory=dict)
+
 
-    def add(self, entity: object):
-        self.entities.setdefault(entity.__class__, [])
-        self.entities[entity.__class__].append(entity)
+class ECS:
+    def __init__(self, stable_order: bool = False):
+        """
+        Args:
+            stable_order:
+                If True, deleting entities keeps the remaining entities of the same type in insertion order.
+                Otherwise deletions are O(1) swap-removes and the order within a type may change.
+        """
+        self.stable_order = stable_order
+        self.entities: dict[type, EntityStore] = {}
+        self.commands = CommandBuffer()
+        self.dead_entity_buffer: dict[int, object] = (
+            self.commands.deletes
+        )  # id(entity): entity
+        self._component_bits: dict[type, int] = {}
+        self._signatures: dict[type, int] = {}  # entity type: OR of its component bits
+        self._entity_types_for_query: dict[
+            tuple[tuple[type, ...], tuple[type, ...]], list[type]
+        ] = {}  # (component types, excluded component types): matching entity types
+        self._query_masks: dict[
+            tuple[tuple[type, ...], tuple[type, ...]], tuple[int, int]
+        ] = {}  # same keys: (required mask, excluded mask)
+        # Guards cache misses of the three dicts above; the scheduler may query from several threads.
+        self._query_cache_lock = threading.RLock()
+        self._numeric_fields: dict[type, dict[str, int]] = {}
+        self._slots: list[Optional[object]] = []
+        self._generations: list[int] = []
+        self._free_slots: list[int] = []
+        self._handles: dict[int, int] = {}  # id(entity): handle
+        self.prefabs: dict[str, Prefab] = {}
+        self.pools: dict[type, EntityPool] = {}
+        self.stats: Optional[ECSStats] = None
+        self.tick = 0
+        self._change_logs: dict[type, dict[int, tuple[int, object]]] = (
+            {}
+        )  # component type: {id(entity): (tick, entity)} ordered from least to most recently changed
+        self._structure_log: Optional[dict[int, int]] = (
+            None
+        )  # handle: tick of its addition, deletion or replacement, ordered like the change logs; kept while tracking changes
+
+    def add(self, entity: object) -> int:
+        """Add `entity` and return its handle.\n
+        A handle is an int packing a slot index (low `HANDLE_INDEX_BITS` bits) and the slot's generation.
+        Slots are reused after deletion with an incremented generation, so stale handles are detected
+        by `entity_for_handle` and `is_alive`."""
+        if id(entity) in self._handles:
+            raise ValueError(f"{entity!r} is already added")
+        entity_type = entity.__class__
+        self._store_for_type(entity_type).append(entity)
+        if self._change_logs:
+            self.mark_changed(entity, *entity_type.__mro__)
+        return self._allocate_handle(entity)
+
+    def add_many(self, entities: Iterable[object]) -> list[int]:
+        """Add `entities` in one batch and return their handles in the same order.\n
+        Entities are appended per type, so each entity type's storage and query index are touched once per batch.
+        """
+        entities = list(entities)
+        entities_for_type: dict[type, list[object]] = {}
+        batch_ids = set()
+        for entity in entities:
+            if id(entity) in self._handles or id(entity) in batch_ids:
+                raise ValueError(f"{entity!r} is already added")
+            batch_ids.add(id(entity))
+            entities_for_type.setdefault(entity.__class__, []).append(entity)
+        for entity_type, new_entities in entities_for_type.items():
+            store = self._store_for_type(entity_type)
+            if store.arrays is not None:
+                store.arrays.reserve(len(store) + len(new_entities))
+            store.extend(new_entities)
+            if self._change_logs:
+                for entity in new_entities:
+                    self.mark_changed(entity, *entity_type.__mro__)
+        return [self._allocate_handle(entity) for entity in entities]
+
+    def register_prefab(self, name: str, prefab: "Prefab"):
+        self.prefabs[name] = prefab
+
+    def spawn(
+        self,
+        prefab: "str | Prefab",
+        count: int = 1,
+        overrides: Optional[dict[str, Any] | Callable[[int], dict[str, Any]]] = None,
+    ) -> list[int]:
+        """Instantiate `prefab` (a `Prefab` or the name of a registered one) `count` times
+        and add the entities with `add_many`.\n
+        `overrides` replaces prefab fields, either as one dict for every entity
+        or as a callable taking the index in the batch and returning a dict.
+        """
+        if isinstance(prefab, str):
+            prefab = self.prefabs[prefab]
+        if callable(overrides):
+            entities = [prefab.instantiate(**overrides(i)) for i in range(count)]
+        else:
+            overrides = overrides or {}
+            entities = [prefab.instantiate(**overrides) for _ in range(count)]
+        return self.add_many(entities)
+
+    def __getstate__(self):
+        """Entities, handles and numeric/change-tracking declarations.
+        Query caches are rebuilt on unpickling; registered prefabs are not kept."""
+        return {
+            "stable_order": self.stable_order,
+            "stores": [
+                (
+                    entity_type,
+                    list(store),
+                    list(map(self._handles.__getitem__, map(id, store))),
+                )
+                for entity_type, store in self.entities.items()
+            ],
+            "generations": self._generations,
+            "free_slots": self._free_slots,
+            "numeric_fields": self._numeric_fields,
+            "tracked_components": list(self._change_logs),
+            "tick": self.tick,
+        }
+
+    def __setstate__(self, state):
+        ECS.__init__(self, state["stable_order"])
+        self._numeric_fields = state["numeric_fields"]
+        self._generations = state["generations"]
+        self._free_slots = state["free_slots"]
+        self._slots = [None] * len(self._generations)
+        for entity_type, entities, handles in state["stores"]:
+            self._store_for_type(entity_type).extend(entities)
+            for entity, handle in zip(entities, handles):
+                self._slots[handle & HANDLE_INDEX_MASK] = entity
+                self._handles[id(entity)] = handle
+        self.track_changes(*state["tracked_components"])
+        self.tick = state["tick"]
+
+    def _store_for_type(self, entity_type: type) -> EntityStore:
+        if (store := self.entities.get(entity_type)) is None:
+            store = self.entities[entity_type] = EntityStore(self.stable_order)
+            self._index_entity_type(entity_type)
+            self._attach_numeric_storage(entity_type)
+        return store
+
+    def _allocate_handle(self, entity: object) -> int:
+        if self._free_slots:
+            index = self._free_slots.pop()
+            self._slots[index] = entity
+        else:
+            index = len(self._slots)
+            self._slots.append(entity)
+            self._generations.append(0)
+        handle = (self._generations[index] << HANDLE_INDEX_BITS) | index
+        self._handles[id(entity)] = handle
+        if self._structure_log is not None:
+            self._log_structure_change(handle)
+        return handle
+
+    def _release_handle(self, entity: object):
+        handle = self._handles.pop(id(entity))
+        if self._structure_log is not None:
+            self._log_structure_change(handle)
+        index = handle & HANDLE_INDEX_MASK
+        self._slots[index] = None
+        self._generations[index] += 1
+        self._free_slots.append(index)
+
+    def _add_with_handle(self, entity: object, handle: int):
+        """Add `entity` under a specific, currently free `handle` (used to restore state)."""
+        index = handle & HANDLE_INDEX_MASK
+        while len(self._slots) <= index:
+            self._free_slots.append(len(self._slots))
+            self._slots.append(None)
+            self._generations.append(0)
+        if self._slots[index] is not None:
+            raise ValueError(f"Handle slot {index} is in use")
+        self._free_slots.remove(index)
+        entity_type = entity.__class__
+        self._store_for_type(entity_type).append(entity)
+        if self._change_logs:
+            self.mark_changed(entity, *entity_type.__mro__)
+        self._slots[index] = entity
+        self._generations[index] = handle >> HANDLE_INDEX_BITS
+        self._handles[id(entity)] = handle
+        if self._structure_log is not None:
+            self._log_structure_change(handle)
+
+    def entities_with_handles(self) -> Generator[tuple[int, object], Any, None]:
+        for index, entity in enumerate(self._slots):
+            if entity is not None:
+                yield (self._generations[index] << HANDLE_INDEX_BITS) | index, entity
+
+    def handle_for(self, entity: object) -> int:
+        return self._handles[id(entity)]
+
+    def entity_for_handle(self, handle: int) -> Optional[object]:
+        """Return the entity for `handle`, or None if it has been deleted."""
+        index = handle & HANDLE_INDEX_MASK
+        if (
+            index < len(self._generations)
+            and self._generations[index] == handle >> HANDLE_INDEX_BITS
+        ):
+            return self._slots[index]
+        return None
+
+    def is_alive(self, handle: int) -> bool:
+        return self.entity_for_handle(handle) is not None
+
+    def _component_mask(self, component_types: Iterable[type]) -> int:
+        mask = 0
+        for component_type in component_types:
+            if component_type is object:  # every entity has it, so it needs no bit
+                continue
+            if (bit := self._component_bits.get(component_type)) is None:
+                with self._query_cache_lock:
+                    if (bit := self._component_bits.get(component_type)) is None:
+                        bit = self._component_bits[component_type] = 1 << len(
+                            self._component_bits
+                        )
+            mask |= bit
+        return mask
+
+    def _index_entity_type(self, entity_type: type):
+        """Give a newly added entity type its signature (the bits of every class in its MRO)
+        and register it with every cached query it matches."""
+        with self._query_cache_lock:
+            signature = self._signatures[entity_type] = self._component_mask(
+                entity_type.__mro__[:-1]
+            )
+            for query_key, entity_types in self._entity_types_for_query.items():
+                required, excluded = self._query_masks[query_key]
+                if signature & required == required and not signature & excluded:
+                    entity_types.append(entity_type)
+
+    def _entity_types_for(
+        self, component_types: tuple[type, ...], without: tuple[type, ...] = ()
+    ) -> list[type]:
+        query_key = (component_types, without)
+        if (entity_types := self._entity_types_for_query.get(query_key)) is not None:
+            return entity_types
+        with self._query_cache_lock:
+            if (entity_types := self._entity_types_for_query.get(query_key)) is None:
+                required = self._component_mask(component_types)
+                excluded = self._component_mask(without)
+                entity_types = [
+                    entity_type
+                    for entity_type, signature in self._signatures.items()
+                    if signature & required == required and not signature & excluded
+                ]
+                self._query_masks[query_key] = (required, excluded)
+                self._entity_types_for_query[query_key] = entity_types
+        return entity_types
+
+    def declare_numeric_components(self, component_type: type, **fields: int):
+        """Store the given attributes of every entity having `component_type`
+        in contiguous NumPy arrays per entity type (requires NumPy).\n
+        `fields` maps attribute names to vector lengths, e.g. `declare_numeric_components(HasCoordinate, pos=2)`;
+        a length of 1 declares a scalar such as `declare_numeric_components(HasHP, hp=1)`.
+        The entity attributes are replaced by Vector2-like views into the arrays
+        (see `mergic.soa.ArrayRowView` for the supported operators and methods) and scalars read as floats.
+        Assigning to them (`entity.pos = Vector2(1, 2)`, `entity.hp -= 1`) writes into the arrays
+        through a `mergic.soa.NumericField` descriptor installed on the entity type.
+        Use `component_arrays` to update a whole entity type in one vectorized operation.
+        """
+        self._numeric_fields.setdefault(component_type, {}).update(fields)
+        for entity_type in self.entities.keys():
+            if component_type in entity_type.__mro__:
+                self._attach_numeric_storage(entity_type)
+
+    def _attach_numeric_storage(self, entity_type: type):
+        fields = {}
+        for component_type in entity_type.__mro__:
+            fields.update(self._numeric_fields.get(component_type, {}))
+        if not fields:
+            return
+        from mergic.soa import ComponentArrays, install_numeric_field
+
+        for name, size in fields.items():
+            install_numeric_field(entity_type, name, size)
+        store = self.entities[entity_type]
+        if store.arrays is None:
+            store.arrays = ComponentArrays(fields, capacity=max(64, len(store)))
+            for entity in store:
+                store.arrays.append(entity)
+            return
+        for name, size in fields.items():
+            if name not in store.arrays.fields:
+                store.arrays.add_field(name, size, store)
+
+    def component_arrays(
+        self, *component_types: type
+    ) -> Generator["ComponentArrays", Any, None]:
+        """Yield the `ComponentArrays` of every entity type with numeric storage
+        that inherits all of `component_types`."""
+        for entity_type in self._entity_types_for(component_types):
+            if (arrays := self.entities[entity_type].arrays) is not None:
+                yield arrays
+
+    def track_changes(self, *component_types: type):
+        """Start recording change ticks for `component_types`.
+        Entities already added count as changed at the current tick.
+        Tracking `object` records a change of any component.\n
+        While changes are tracked, additions, deletions and replacements are also recorded per handle
+        (see `handles_changed_structurally`)."""
+        if component_types and self._structure_log is None:
+            self._structure_log = {}
+        for component_type in component_types:
+            if component_type in self._change_logs:
+                continue
+            self._change_logs[component_type] = {}
+            for entity in self.entities_for_components(component_type):
+                self.mark_changed(entity, component_type)
+
+    def mark_changed(self, entity: object, *component_types: type):
+        """Record that `component_types` of `entity` changed at the current tick.
+        Component types that are not tracked are ignored.
+        Writes through numeric component views are not detected automatically."""
+        entity_id = id(entity)
+        if object in self._change_logs:
+            component_types = (*component_types, object)
+        for component_type in component_types:
+            if (change_log := self._change_logs.get(component_type)) is not None:
+                change_log.pop(entity_id, None)
+                change_log[entity_id] = (self.tick, entity)
+
+    def _log_structure_change(self, handle: int):
+        self._structure_log.pop(handle, None)
+        self._structure_log[handle] = self.tick
+
+    def handles_changed_structurally(self, since_tick: Optional[int] = None) -> list[int]:
+        """Return the handles added, deleted or replaced at or after `since_tick` (default: the current tick).\n
+        Only recorded while changes are tracked (see `track_changes`).
+        Handles are kept after deletion until `forget_structural_changes` drops them.
+        """
+        if self._structure_log is None:
+            raise ValueError("Changes are not tracked")
+        if since_tick is None:
+            since_tick = self.tick
+        handles = []
+        for handle, tick in reversed(self._structure_log.items()):
+            if tick < since_tick:
+                break
+            handles.append(handle)
+        return handles
+
+    def forget_structural_changes(self, before_tick: int):
+        """Drop the handles recorded by `handles_changed_structurally` before `before_tick`."""
+        structure_log = self._structure_log
+        stale = [
+            handle
+            for handle, _ in takewhile(lambda item: item[1] < before_tick, structure_log.items())
+        ]
+        for handle in stale:
+            del structure_log[handle]
+
+    def advance_tick(self) -> int:
+        self.tick += 1
+        return self.tick
+
+    def entities_for_changed_components(
+        self, *component_types: type, since_tick: Optional[int] = None
+    ) -> list[object]:
+        """Return entities having all `component_types`
+        where any of `component_types` changed at or after `since_tick` (default: the current tick).\n
+        Only the changed entities are visited, not every entity having the components.
+        """
+        if since_tick is None:
+            since_tick = self.tick
+        matching_types = self._entity_types_for(component_types)
+        changed = {}
+        for component_type in component_types:
+            for tick, entity in reversed(self._change_logs[component_type].values()):
+                if tick < since_tick:
+                    break
+                if entity.__class__ in matching_types:
+                    changed[id(entity)] = entity
+        return list(changed.values())
+
+    def _forget_changes(self, entity: object):
+        for component_type in entity.__class__.__mro__:
+            if (change_log := self._change_logs.get(component_type)) is not None:
+                change_log.pop(id(entity), None)
+
+    def enable_pool[T](
+        self,
+        entity_type: type[T],
+        reset: Callable[..., None],
+        max_size: int = 1024,
+    ) -> EntityPool[T]:
+        """Recycle deleted entities of `entity_type` through `acquire`.\n
+        Once enabled, every deletion of an `entity_type` entity hands the instance to the pool,
+        so it must not be used after deletion. See `EntityPool` for `reset`.
+        """
+        pool = self.pools[entity_type] = EntityPool(entity_type, reset, max_size)
+        return pool
+
+    def acquire(self, entity_type: type, **kwargs) -> int:
+        """Add a recycled (or, if none is left, new) `entity_type` entity built from `kwargs`
+        and return its handle."""
+        return self.add(self.pools[entity_type].acquire(**kwargs))
+
+    def pool_stats(self, entity_type: type) -> PoolStats:
+        return replace(self.pools[entity_type].stats)
 
     def delete_now(self, entity):
         self.entities[entity.__class__].remove(entity)
+        self._release_handle(entity)
+        if self._change_logs:
+            self._forget_changes(entity)
+        if (pool := self.pools.get(entity.__class__)) is not None:
+            pool.release(entity)
+
+    def replace_entity(self, entity: object, new_entity: object):
+        """Put `new_entity` in place of `entity`, keeping its handle.\n
+        Since an entity's components are its type's bases, this is how an entity changes its component set.
+        """
+        if id(new_entity) in self._handles:
+            raise ValueError(f"{new_entity!r} is already added")
+        handle = self._handles.pop(id(entity))
+        self.entities[entity.__class__].remove(entity)
+        if self._change_logs:
+            self._forget_changes(entity)
+        new_entity_type = new_entity.__class__
+        self._store_for_type(new_entity_type).append(new_entity)
+        self._slots[handle & HANDLE_INDEX_MASK] = new_entity
+        self._handles[id(new_entity)] = handle
+        if self._change_logs:
+            self.mark_changed(new_entity, *new_entity_type.__mro__)
+        if self._structure_log is not None:
+            self._log_structure_change(handle)
+
+    def apply_commands(self):
+        """Apply the changes recorded in `commands` at a point where no entity iteration is running.\n
+        Spawns are added first with one `add_many` call, then replacements are made,
+        then deletions are done per entity type in one batch.
+        An entity both replaced and deleted is only deleted.
+        """
+        commands = self.commands
+        if commands.spawns:
+            spawns = list(commands.spawns)
+            commands.spawns.clear()
+            self.add_many(spawns)
+        if commands.replacements:
+            replacements = list(commands.replacements.values())
+            commands.replacements.clear()
+            for entity, new_entity in replacements:
+                if id(entity) not in commands.deletes:
+                    self.replace_entity(entity, new_entity)
+        if commands.deletes:
+            self.do_reserved_deletions()
 
     def reserve_to_delete(self, entity):
-        if entity not in self.dead_entity_buffer:
-            self.dead_entity_buffer.append(entity)
+        self.commands.delete(entity)
 
     def do_reserved_deletions(self):
-        for entity in self.dead_entity_buffer:
-            self.delete_now(entity)
+        dead_entities_for_type: dict[type, list[object]] = {}
+        for entity in self.dead_entity_buffer.values():
+            dead_entities_for_type.setdefault(entity.__class__, []).append(entity)
         self.dead_entity_buffer.clear()
+        for entity_type, dead_entities in dead_entities_for_type.items():
+            self.entities[entity_type].remove_many(dead_entities)
+            for entity in dead_entities:
+                self._release_handle(entity)
+                if self._change_logs:
+                    self._forget_changes(entity)
+            if (pool := self.pools.get(entity_type)) is not None:
+                for entity in dead_entities:
+                    pool.release(entity)
+
+    _STATS_WRAPPED_METHODS = (
+        "add",
+        "add_many",
+        "delete_now",
+        "do_reserved_deletions",
+        "entities_for_components",
+    )
+
+    def enable_stats(self):
+        """Start recording query and structural-change statistics into `stats`.\n
+        Recording works by shadowing the affected methods with instance attributes,
+        so while it is disabled the methods run without any extra check.
+        Call `end_stats_frame` once per frame to roll the per-frame add/delete counts.
+        """
+        if self.stats is not None:
+            return
+        self.stats = stats = ECSStats()
+        add = self.add
+        add_many = self.add_many
+        delete_now = self.delete_now
+        do_reserved_deletions = self.do_reserved_deletions
+        entities_for_components = self.entities_for_components
+
+        def count(counter: dict[type, int], entity: object):
+            counter[entity.__class__] = counter.get(entity.__class__, 0) + 1
+
+        def add_with_stats(entity):
+            count(stats.adds, entity)
+            return add(entity)
+
+        def add_many_with_stats(entities):
+            entities = list(entities)
+            for entity in entities:
+                count(stats.adds, entity)
+            return add_many(entities)
+
+        def delete_now_with_stats(entity):
+            count(stats.deletes, entity)
+            delete_now(entity)
+
+        def do_reserved_deletions_with_stats():
+            for entity in self.dead_entity_buffer.values():
+                count(stats.deletes, entity)
+            do_reserved_deletions()
+
+        def entities_for_components_with_stats(
+            *component_types, without=(), optional=()
+        ):
+            query_stats = stats.queries.setdefault(
+                (component_types, without, optional), QueryStats()
+            )
+            query_stats.calls += 1
+            yielded = 0
+            start = time.perf_counter_ns()
+            try:
+                for item in entities_for_components(
+                    *component_types, without=without, optional=optional
+                ):
+                    yielded += 1
+                    yield item
+            finally:
+                query_stats.total_time_ns += time.perf_counter_ns() - start
+                query_stats.entities_yielded += yielded
+
+        self.add = add_with_stats
+        self.add_many = add_many_with_stats
+        self.delete_now = delete_now_with_stats
+        self.do_reserved_deletions = do_reserved_deletions_with_stats
+        self.entities_for_components = entities_for_components_with_stats
+
+    def disable_stats(self):
+        if self.stats is None:
+            return
+        for name in self._STATS_WRAPPED_METHODS:
+            del self.__dict__[name]
+        self.stats = None
+
+    def end_stats_frame(self):
+        if self.stats is None:
+            return
+        self.stats.last_frame_adds = self.stats.adds
+        self.stats.last_frame_deletes = self.stats.deletes
+        self.stats.adds = {}
+        self.stats.deletes = {}
+
+    def stats_snapshot(self) -> Optional[ECSStats]:
+        """Return a copy of `stats` that later recording does not modify."""
+        if self.stats is None:
+            return None
+        return ECSStats(
+            queries={key: replace(value) for key, value in self.stats.queries.items()},
+            adds=dict(self.stats.adds),
+            deletes=dict(self.stats.deletes),
+            last_frame_adds=dict(self.stats.last_frame_adds),
+            last_frame_deletes=dict(self.stats.last_frame_deletes),
+        )
 
     def entities_for_type[T](self, entity_type: Type[T]) -> Generator[T, Any, None]:
         yield from self.entities[entity_type]
 
     def entities_for_components[T](
-        self, *component_types: type[T]
+        self,
+        *component_types: type[T],
+        without: tuple[type, ...] = (),
+        optional: tuple[type, ...] = (),
     ) -> Generator[T, Any, None]:
-        """TODO: fix this to be more efficient\n
+        """Yield every entity whose type inherits all of `component_types` and none of `without`.\n
+        Every component type gets a bit and every entity type a signature of its components' bits,
+        so matching an entity type is a single AND. Matching entity types are cached per query
+        and the cache is only updated when `add` sees a new entity type.
+        If `optional` is given, `(entity, present)` tuples are yielded instead,
+        where `present` holds one bool per `optional` component, computed once per entity type.
+        Entities are yielded from the live storage; record structural changes made while iterating
+        in `commands` (or with `reserve_to_delete`) and apply them with `apply_commands` afterwards.\n
         If you want to use a union type alias for `component_types`,
         you can do it with typing.get_args function converts the type alias to the tuple of types.
         """
-        entities = deque()
-        for entity_type in self.entities.keys():
-            if set(component_types).issubset(entity_type.__mro__):
-                entities.extend(self.entities_for_type(entity_type))
-        yield from entities
+        if not optional:
+            for entity_type in self._entity_types_for(component_types, without):
+                yield from self.entities[entity_type]
+            return
+        optional_bits = [self._component_mask((c,)) for c in optional]
+        for entity_type in self._entity_types_for(component_types, without):
+            signature = self._signatures[entity_type]
+            present = tuple(bool(signature & bit) for bit in optional_bits)
+            for entity in self.entities[entity_type]:
+                yield entity, present
+
+
+class ActionSet:
+    """Action names compiled to small ints.
+    Share one set between the `ActionController`s of similar entities so ids match across them."""
+
+    def __init__(self, actions: Iterable[str] = ()):
+        self.ids: dict[str, int] = {}
+        for action in actions:
+            self.add(action)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, action: str) -> int:
+        return self.ids[action]
+
+    def add(self, action: str) -> int:
+        return self.ids.setdefault(action, len(self.ids))
 
 
 class ActionController:
-    def __init__(self):
-        self.actions: dict[
-            str, dict[str, bool | Any]
-        ] = {}  # example: { "action_key": {"active": False, "property": {}}}
+    """Per-entity action state.
+
+    Active flags are the bits of the `active` int, indexed by action id,
+    and properties are a list indexed by action id.
+    The `*_id` methods take ids from `action_id` (or the shared `ActionSet`) and skip all dict lookups;
+    the methods taking action names are thin wrappers around them.
+    """
+
+    __slots__ = ("action_set", "active", "registered", "properties")
+
+    def __init__(self, action_set: Optional[ActionSet] = None):
+        self.action_set = action_set if action_set is not None else ActionSet()
+        self.active: int = 0
+        self.registered: int = 0
+        self.properties: list[Optional[dict]] = []
 
     def add_action(self, action: str, property: dict):
-        self.actions.setdefault(action, {"active": False, "property": property})
+        action_id = self.action_set.add(action)
+        if self.registered >> action_id & 1:
+            return
+        self.registered |= 1 << action_id
+        if len(self.properties) <= action_id:
+            self.properties.extend([None] * (action_id + 1 - len(self.properties)))
+        self.properties[action_id] = property
+
+    def action_id(self, action: str) -> int:
+        if (action_id := self.action_set.ids.get(action)) is None or not (
+            self.registered >> action_id & 1
+        ):
+            raise ValueError(f"Action '{action}' is not registered")
+        return action_id
+
+    @property
+    def actions(self) -> dict[str, dict[str, bool | Any]]:
+        """Read-only view in the former `{"action_key": {"active": False, "property": {}}}` layout."""
+        return {
+            action: {
+                "active": bool(self.active >> action_id & 1),
+                "property": self.properties[action_id],
+            }
+            for action, action_id in self.action_set.ids.items()
+            if self.registered >> action_id & 1
+        }
 
     def mutable_property(self, action: str):
-        return self.actions[action]["property"]
+        return self.properties[self.action_id(action)]
+
+    def do_id(self, action_id: int):
+        self.active |= 1 << action_id
+
+    def cancel_id(self, action_id: int):
+        self.active &= ~(1 << action_id)
+
+    def is_active_id(self, action_id: int) -> bool:
+        return bool(self.active >> action_id & 1)
 
     def do(self, action: str):
-        if self.actions.get(action, False):
-            self.actions[action]["active"] = True
-        else:
-            raise ValueError(f"Action '{action}' is not registered")
+        self.do_id(self.action_id(action))
 
     def cancel(self, action: str):
-        if self.actions.get(action, False):
-            self.actions[action]["active"] = False
-        else:
-            raise ValueError(f"Action '{action}' is not registered")
+        self.cancel_id(self.action_id(action))
 
     def is_active(self, action: str) -> bool:
-        return self.actions[action]["active"]
+        return self.is_active_id(self.action_id(action))
 
 
 class GameWorld(ECS):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, stable_order: bool = False):
+        super().__init__(stable_order)
         self.maps: dict[str, TileMap] = {}
+        self.systems = SystemScheduler()
+        self.spatial_index: Optional[SpatialHash] = None
+        self.position_attr = "pos"
+        self.inbox: list[Any] = []  # events sent to this world from other maps
+        self.outbox: list[Any] = []  # events for other maps, see `mergic.shard`
+
+    def post_event(self, event: Any):
+        """Queue `event` for delivery outside this world (e.g. from a map shard to the main process)."""
+        self.outbox.append(event)
+
+    def add(self, entity: object) -> int:
+        handle = super().add(entity)
+        if self.spatial_index is not None:
+            self._insert_into_spatial_index(entity)
+        return handle
+
+    def add_many(self, entities: Iterable[object]) -> list[int]:
+        entities = list(entities)
+        handles = super().add_many(entities)
+        if self.spatial_index is not None:
+            for entity in entities:
+                self._insert_into_spatial_index(entity)
+        return handles
+
+    def replace_entity(self, entity: object, new_entity: object):
+        super().replace_entity(entity, new_entity)
+        if self.spatial_index is not None:
+            if entity in self.spatial_index:
+                self.spatial_index.remove(entity)
+            self._insert_into_spatial_index(new_entity)
+
+    def _add_with_handle(self, entity: object, handle: int):
+        super()._add_with_handle(entity, handle)
+        if self.spatial_index is not None:
+            self._insert_into_spatial_index(entity)
+
+    def delete_now(self, entity):
+        super().delete_now(entity)
+        if self.spatial_index is not None and entity in self.spatial_index:
+            self.spatial_index.remove(entity)
+
+    def do_reserved_deletions(self):
+        dead_entities = list(self.dead_entity_buffer.values())
+        super().do_reserved_deletions()
+        if self.spatial_index is not None:
+            for entity in dead_entities:
+                if entity in self.spatial_index:
+                    self.spatial_index.remove(entity)
+
+    def __getstate__(self):
+        """`ECS` state plus maps. Systems are not kept and must be registered again."""
+        state = super().__getstate__()
+        state["maps"] = self.maps
+        state["spatial_index"] = (
+            (self.spatial_index.cell_size, self.position_attr)
+            if self.spatial_index is not None
+            else None
+        )
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.maps = state["maps"]
+        self.systems = SystemScheduler()
+        self.spatial_index = None
+        self.position_attr = "pos"
+        self.inbox = []
+        self.outbox = []
+        if state["spatial_index"] is not None:
+            self.enable_spatial_index(*state["spatial_index"])
+
+    def enable_spatial_index(self, cell_size: float, position_attr: str = "pos"):
+        """Index every entity having the `position_attr` attribute in a `SpatialHash`,
+        available as `spatial_index`.\n
+        Entities are inserted and removed as they are added and deleted.
+        Position changes must be reported with `move` or `sync_spatial_index`.
+        """
+        self.spatial_index = SpatialHash(cell_size)
+        self.position_attr = position_attr
+        for store in self.entities.values():
+            for entity in store:
+                self._insert_into_spatial_index(entity)
+
+    def _insert_into_spatial_index(self, entity: object):
+        if (pos := getattr(entity, self.position_attr, None)) is not None:
+            self.spatial_index.insert(entity, pos)
+
+    def move(self, entity: object, pos: Sequence[float]):
+        """Set the position of `entity` and update `spatial_index`."""
+        position = getattr(entity, self.position_attr)
+        position[0], position[1] = pos[0], pos[1]
+        if self.spatial_index is not None:
+            self.spatial_index.move(entity, position)
+
+    def sync_spatial_index(self, entities: Optional[Iterable[object]] = None):
+        """Re-read the positions of `entities` (default: every indexed entity) into `spatial_index`.\n
+        Pass `entities_for_changed_components(...)` to only sync moved entities."""
+        if entities is None:
+            entities = list(self.spatial_index)
+        for entity in entities:
+            if entity in self.spatial_index:
+                self.spatial_index.move(entity, getattr(entity, self.position_attr))
 
     def map_for_name(self, map_name) -> TileMap:
         return self.maps.get(map_name)
@@ -97,6 +1029,20 @@ class GameWorld(ECS):
     def set_map(self, map_name, tilemap: TileMap):
         self.maps[map_name] = tilemap
 
+    def add_system(
+        self,
+        name: str,
+        fn: Callable[["GameWorld", float], None],
+        reads: Iterable[type] = (),
+        writes: Iterable[type] = (),
+    ):
+        """Register `fn(world, dt)` to be run by `run_systems`.
+        `reads` and `writes` are the component types it accesses; see `SystemScheduler`."""
+        self.systems.add(name, fn, reads, writes)
+
+    def run_systems(self, dt):
+        self.systems.run(self, dt)
+
 
 @dataclass
 class Scene:
@@ -105,6 +1051,13 @@ class Scene:
 
     @staticmethod
     def print_clockinfo(fn: Callable, measurement_times=3):
+        """Deprecated: printing every frame costs more than most scenes and an average hides hitches.
+        Use `mergic.telemetry.FrameTelemetry` (e.g. `basic_mainloop(telemetry=...)`) instead."""
+        warnings.warn(
+            "Scene.print_clockinfo is deprecated; use mergic.telemetry.FrameTelemetry instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         fps_history = deque()
 
         def wrapper(self, dt):
@@ -118,6 +1071,13 @@ class Scene:
 
         return wrapper
 
+    def preload(self, report_progress: Callable[[float], None]):
+        """Load assets ahead of `setup`. Called on a worker thread by `SceneManager.preload`,
+        or before `setup` on the main thread if the scene was not preloaded.\n
+        Must not touch the display (e.g. `Surface.convert`); leave that to `setup`.
+        Call `report_progress` with a fraction between 0 and 1 to report progress."""
+        pass
+
     def setup(self):
         pass
 
@@ -130,16 +1090,95 @@ class Scene:
     def update(self, dt):
         pass
 
-    def change_scene(self, next_scene_name: str):
-        self.manager.change_scene(next_scene_name)
+    def fixed_update(self, dt):
+        """Advance the simulation by one fixed step when the main loop runs at a fixed tick rate.
+        Defaults to `update`, which then also draws.\n
+        A frame may run zero or several steps, so per-frame input such as
+        `InputSnapshot.triggered` must not be consumed here (it would be dropped or repeated);
+        handle it once per frame in `handle_event` or `render` instead."""
+        self.update(dt)
+
+    def render(self, alpha: float):
+        """Draw to `screen` in fixed tick rate mode, once per frame after the frame's `fixed_update`s.
+        `alpha` (0 <= alpha < 1) is how far the frame is between the last and the next tick,
+        to interpolate positions with."""
+        pass
+
+    def take_dirty_rects(self) -> Optional[list[pygame.Rect]]:
+        """Regions of `screen` drawn since the previous call, so that only those are presented.
+        `None` (the default) means the whole screen may have changed."""
+        return None
+
+    def suspend(self):
+        """Called when another scene is pushed on top of this one. The scene keeps its state."""
+        pass
+
+    def resume(self):
+        """Called when the scene on top of this one is popped."""
+        pass
+
+    def memory_usage(self) -> int:
+        """Estimated bytes held by the scene, used by `SceneManager.memory_budget`.
+        By default the pixel data of the surfaces directly referenced by the scene's attributes."""
+        return sum(
+            value.get_bytesize() * value.get_width() * value.get_height()
+            for value in vars(self).values()
+            if isinstance(value, pygame.Surface) and value is not self.screen
+        )
+
+    def change_scene(self, next_scene_name: str, wait: bool = True):
+        self.manager.change_scene(next_scene_name, wait=wait)
+
+
+class ScenePreload:
+    """Progress of a `Scene.preload` running on a worker thread."""
+
+    def __init__(self):
+        self.progress: float = 0.0
+        self.future: Optional[Future] = None
+
+    def report_progress(self, progress: float):
+        self.progress = progress
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def wait(self):
+        """Block until the preload finished. Re-raises its exception if it failed."""
+        self.future.result()
+        self.progress = 1.0
+
+
+@dataclass
+class SuspendedScene:
+    name: str
+    update_interval: Optional[int] = None
+    evicted: bool = False
+    frames: int = 0
+    accumulated_dt: float = 0
 
 
 class SceneManager:
-    def __init__(self, scenes: dict[str, Scene], screen: Optional[pygame.surface.Surface] = None):
+    def __init__(
+        self,
+        scenes: dict[str, Scene],
+        screen: Optional[pygame.surface.Surface] = None,
+        memory_budget: Optional[int] = None,
+    ):
+        """`memory_budget`: bytes that suspended scenes may hold in total (see `Scene.memory_usage`).
+        When exceeded, the least recently active suspended scenes are evicted."""
         self.screen = screen
+        self.input = InputMapper()
         self.__current_scene: Optional[str] = None
         self.__scenes: dict[str, Scene] = {}
         self.scenes = scenes
+        self.preloads: dict[str, ScenePreload] = {}
+        self.pending_scene: Optional[str] = None
+        self._preload_executor: Optional[ThreadPoolExecutor] = None
+        self.scene_stack: list[SuspendedScene] = []  # bottom first
+        self.memory_budget = memory_budget
+        self._needs_full_redraw = True
     
     @property
     def scenes(self):
@@ -151,41 +1190,191 @@ class SceneManager:
             if scene.screen is None:
                 scene.screen = self.screen
             scene.manager = self
-        print("this is scenes", self.__scenes)
         self.__scenes = scenes
 
     @property
     def current_scene(self):
         if self.__current_scene is None and len(self.scenes) > 0:
             self.__current_scene = next(iter(self.scenes))
+            self._wait_preload(self.__current_scene)
             self.scenes[self.__current_scene].setup()
         return self.__current_scene
 
+    @current_scene.setter
+    def current_scene(self, scene_name: str):
+        self.__current_scene = scene_name
+
     def add(self, scene: Scene, scene_name=str):
         if scene.screen is None:
             scene.screen = self.screen
         scene.manager = self
         self.scenes[scene_name] = scene
 
+    def preload(self, scene_name: str) -> ScenePreload:
+        """Start `Scene.preload` of `scene_name` on the worker thread unless it's already started.\n
+        Preloads run one at a time in the order they were requested."""
+        if (scene_preload := self.preloads.get(scene_name)) is not None:
+            return scene_preload
+        if self._preload_executor is None:
+            self._preload_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="mergic-preload"
+            )
+        scene_preload = ScenePreload()
+        scene_preload.future = self._preload_executor.submit(
+            self.scenes[scene_name].preload, scene_preload.report_progress
+        )
+        self.preloads[scene_name] = scene_preload
+        return scene_preload
+
+    def _wait_preload(self, scene_name: str):
+        if (scene_preload := self.preloads.get(scene_name)) is not None:
+            scene_preload.wait()
+        else:
+            scene_preload = ScenePreload()
+            self.scenes[scene_name].preload(scene_preload.report_progress)
+            scene_preload.future = Future()
+            scene_preload.future.set_result(None)
+            self.preloads[scene_name] = scene_preload
+
     def change_scene(
         self,
         next_scene_name: str,
-        block_events_until_setup_finished: Optional[Sequence[pygame.event.EventType]],
+        block_events_until_setup_finished: Optional[Sequence[pygame.event.EventType]] = None,
+        wait: bool = True,
     ):
+        """Switch to `next_scene_name`.\n
+        With `wait=False` the scene is preloaded in the background and the switch happens
+        at the start of the first `update` after the preload finished;
+        until then the current scene keeps receiving events and updates.
+        Only the current scene is replaced; suspended scenes of `scene_stack` stay as they are."""
+        if not wait:
+            self.preload(next_scene_name)
+            self.pending_scene = next_scene_name
+            return
+        self.pending_scene = None
         if block_events_until_setup_finished:
             pygame.event.set_blocked(block_events_until_setup_finished)
-        self.scenes[self.current_scene].cleanup()
-        self.current_scene = next_scene_name
-        self.scenes[self.current_scene].setup()
+        self._cleanup_scene(self.current_scene)
+        self._setup_scene(next_scene_name)
         if block_events_until_setup_finished:
             pygame.event.set_allowed(block_events_until_setup_finished)
 
+    def _setup_scene(self, scene_name: str):
+        self._wait_preload(scene_name)
+        self.current_scene = scene_name
+        self.scenes[scene_name].setup()
+        self._needs_full_redraw = True
+
+    def _cleanup_scene(self, scene_name: str):
+        self.scenes[scene_name].cleanup()
+        self.preloads.pop(scene_name, None)
+
+    def push_scene(self, scene_name: str, suspended_update_interval: Optional[int] = None):
+        """Suspend the current scene without cleaning it up and switch to `scene_name`.\n
+        With `suspended_update_interval=n` the suspended scene is still updated every n-th frame
+        (before the scenes above it) with the dt accumulated since its last update;
+        otherwise it is not updated until it's resumed by `pop_scene`."""
+        current_scene = self.current_scene
+        if scene_name == current_scene or any(
+            suspended.name == scene_name for suspended in self.scene_stack
+        ):
+            raise ValueError(f"Scene '{scene_name}' is already on the scene stack")
+        self.scenes[current_scene].suspend()
+        self.scene_stack.append(SuspendedScene(current_scene, suspended_update_interval))
+        self._setup_scene(scene_name)
+        self._enforce_memory_budget()
+
+    def pop_scene(self):
+        """Clean up the current scene and resume the scene below it.
+        An evicted scene is preloaded and set up again instead."""
+        if not self.scene_stack:
+            raise ValueError("No suspended scene to return to")
+        self._cleanup_scene(self.current_scene)
+        suspended = self.scene_stack.pop()
+        if suspended.evicted:
+            self._setup_scene(suspended.name)
+        else:
+            self.current_scene = suspended.name
+            self.scenes[suspended.name].resume()
+            self._needs_full_redraw = True
+
+    def suspended_memory_usage(self) -> int:
+        return sum(
+            self.scenes[suspended.name].memory_usage()
+            for suspended in self.scene_stack
+            if not suspended.evicted
+        )
+
+    def _enforce_memory_budget(self):
+        if self.memory_budget is None:
+            return
+        usage = self.suspended_memory_usage()
+        # The stack is ordered by when its scenes were last active, least recent first.
+        for suspended in self.scene_stack:
+            if usage <= self.memory_budget:
+                break
+            if suspended.evicted:
+                continue
+            usage -= self.scenes[suspended.name].memory_usage()
+            self._cleanup_scene(suspended.name)
+            suspended.evicted = True
+
     def handle_event(self, event: pygame.event.Event):
         self.scenes[self.current_scene].handle_event(event)
 
+    def switch_to_pending_scene(self):
+        """Switch to the scene of `change_scene(wait=False)` if its preload finished. Done by `update`;
+        call once per frame before `fixed_update` when running at a fixed tick rate."""
+        if self.pending_scene is not None and self.preloads[self.pending_scene].done:
+            self.change_scene(self.pending_scene)
+
+    def _updated_suspended_scenes(self, dt):
+        for suspended in self.scene_stack:
+            if suspended.evicted or not suspended.update_interval:
+                continue
+            suspended.frames += 1
+            suspended.accumulated_dt += dt
+            if suspended.frames % suspended.update_interval == 0:
+                yield self.scenes[suspended.name], suspended.accumulated_dt
+                suspended.accumulated_dt = 0
+
     def update(self, dt):
+        self.switch_to_pending_scene()
+        for scene, scene_dt in self._updated_suspended_scenes(dt):
+            scene.update(scene_dt)
         self.scenes[self.current_scene].update(dt)
 
+    def fixed_update(self, dt):
+        for scene, scene_dt in self._updated_suspended_scenes(dt):
+            scene.fixed_update(scene_dt)
+        self.scenes[self.current_scene].fixed_update(dt)
+
+    def render(self, alpha: float):
+        for suspended in self.scene_stack:
+            if not suspended.evicted and suspended.update_interval:
+                self.scenes[suspended.name].render(alpha)
+        self.scenes[self.current_scene].render(alpha)
+
+    def take_dirty_rects(self) -> Optional[list[pygame.Rect]]:
+        """Dirty rects of the drawn scenes (see `Scene.take_dirty_rects`),
+        or `None` if the whole screen must be presented, e.g. after a scene switch."""
+        rects = []
+        for suspended in self.scene_stack:
+            if not suspended.evicted and suspended.update_interval:
+                scene_rects = self.scenes[suspended.name].take_dirty_rects()
+                rects = None if scene_rects is None or rects is None else rects + scene_rects
+        scene_rects = self.scenes[self.current_scene].take_dirty_rects()
+        if self._needs_full_redraw or scene_rects is None or rects is None:
+            self._needs_full_redraw = False
+            return None
+        return rects + scene_rects
+
+    def shutdown(self):
+        """Stop the preload worker thread, waiting for a running preload to finish."""
+        if self._preload_executor is not None:
+            self._preload_executor.shutdown(cancel_futures=True)
+            self._preload_executor = None
+
 
 class TextMenu:
     def __init__(self):
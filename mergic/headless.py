@@ -0,0 +1,136 @@
+"""Run scenes without a display and without a frame cap, for benchmarks.
+
+The loop is the one of `mergic.mainloop_template.basic_mainloop` under the SDL dummy video
+driver, with every frame given the same simulated `dt` instead of waiting for `clock.tick`.
+
+Command line:
+
+    python -m mergic.headless package.module:SceneClass --frames 600 --json timings.json
+"""
+
+import argparse
+import functools
+import importlib
+import json
+import os
+import sys
+from typing import Callable, Optional
+
+import pygame
+
+from mergic import Scene, SceneManager
+from mergic.mainloop_template import FixedTimestep, run_frame
+from mergic.presenter import DisplayPresenter, Sdl2Presenter
+from mergic.telemetry import FrameTelemetry
+
+
+_DUMMY_DRIVERS = ("SDL_VIDEODRIVER", "SDL_AUDIODRIVER")
+
+
+def run_headless(
+    scenes: dict[str, Scene] | type[Scene],
+    frames: int = 600,
+    screen_size=(640, 360),
+    px_scale=1,
+    dt: float = 1000 / 60,
+    tick_rate: Optional[int] = None,
+    max_catch_up_steps: int = 5,
+    telemetry: Optional[FrameTelemetry] = None,
+    presenter_type: Callable[..., DisplayPresenter | Sdl2Presenter] = DisplayPresenter,
+) -> FrameTelemetry:
+    """Run `scenes` (or a single scene class, instantiated without arguments) for `frames` frames
+    and return the telemetry of every frame.\n
+    Each frame gets the pygame events (normally none), `dt` milliseconds of simulated time
+    (through `Scene.fixed_update` at `tick_rate` if given) and is presented to the dummy display."""
+    if isinstance(scenes, type):
+        scenes = {scenes.__name__: scenes()}
+    if telemetry is None:
+        telemetry = FrameTelemetry(capacity=max(frames, 1))
+    # Only for this run: a windowed run later in the same process must get the real drivers.
+    previous_environ = {name: os.environ.get(name) for name in _DUMMY_DRIVERS}
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    try:
+        pygame.init()
+        presenter = presenter_type(screen_size, None)
+        screen = pygame.surface.Surface([size // px_scale for size in screen_size])
+        scene_manager = SceneManager(scenes=scenes, screen=screen)
+        fixed_timestep = FixedTimestep(tick_rate, max_catch_up_steps) if tick_rate else None
+        try:
+            for _ in range(frames):
+                telemetry.begin_frame()
+                events = pygame.event.get()
+                scene_manager.input.update(events)
+                for event in events:
+                    scene_manager.handle_event(event)
+                telemetry.lap("events")
+                run_frame(scene_manager, dt, fixed_timestep, telemetry)
+                presenter.present(screen, scene_manager.take_dirty_rects())
+                telemetry.lap("present")
+                telemetry.end_frame()
+        finally:
+            scene_manager.shutdown()
+            presenter.close()
+    finally:
+        pygame.quit()
+        for name, value in previous_environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return telemetry
+
+
+PRESENTER_TYPES = {
+    "display": DisplayPresenter,
+    "sdl2": Sdl2Presenter,
+    "sdl2-software": functools.partial(Sdl2Presenter, software=True),
+}
+
+
+def _load_scene_class(path: str) -> type[Scene]:
+    module_name, _, class_name = path.partition(":")
+    if not class_name:
+        raise ValueError(f"Expected 'module:SceneClass', got '{path}'")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m mergic.headless",
+        description="Run a Scene headless and uncapped and report its frame times.",
+    )
+    parser.add_argument("scene", help="scene class to run, as 'module:SceneClass'")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--dt", type=float, default=1000 / 60, help="simulated milliseconds per frame")
+    parser.add_argument("--tick-rate", type=int, default=None)
+    parser.add_argument("--screen-size", type=int, nargs=2, default=(640, 360))
+    parser.add_argument("--px-scale", type=int, default=1)
+    parser.add_argument(
+        "--presenter",
+        choices=tuple(PRESENTER_TYPES),
+        default="display",
+        help="how the screen is scaled onto the window",
+    )
+    parser.add_argument("--csv", help="write per-frame timings to this CSV file")
+    parser.add_argument("--json", help="write the summary and per-frame timings to this JSON file")
+    args = parser.parse_args(argv)
+    telemetry = run_headless(
+        _load_scene_class(args.scene),
+        frames=args.frames,
+        screen_size=tuple(args.screen_size),
+        px_scale=args.px_scale,
+        dt=args.dt,
+        tick_rate=args.tick_rate,
+        presenter_type=PRESENTER_TYPES[args.presenter],
+    )
+    if args.csv:
+        telemetry.write_csv(args.csv)
+    if args.json:
+        telemetry.write_json(args.json)
+    json.dump(telemetry.summary(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
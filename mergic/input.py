@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from typing import Hashable, Iterable, Optional, Sequence
+
+import pygame
+
+Action = Hashable
+
+
+@dataclass(frozen=True)
+class InputSnapshot:
+    """The actions of one frame.
+
+    Attributes:
+        held: Actions with a bound key held down at the time of the snapshot.
+        triggered: Actions whose key or mouse button was pressed during the frame (key repeats included).
+        released: Actions whose key or mouse button was released during the frame.
+    """
+
+    held: frozenset[Action] = field(default_factory=frozenset)
+    triggered: frozenset[Action] = field(default_factory=frozenset)
+    released: frozenset[Action] = field(default_factory=frozenset)
+
+    def axis(self, negative: Action, positive: Action) -> int:
+        """-1, 0 or 1 depending on which of the two actions is held."""
+        return (positive in self.held) - (negative in self.held)
+
+
+class InputMapper:
+    """Turns a frame's pygame events and key state into an `InputSnapshot` once per frame.
+
+    Bind actions (any hashable, e.g. strings or Enum members) to keys and mouse buttons here,
+    then read `snapshot` from scenes, controllers and UI instead of polling pygame per entity.
+    """
+
+    def __init__(self):
+        self.key_bindings: dict[int, set[Action]] = {}
+        self.mouse_button_bindings: dict[int, set[Action]] = {}
+        self.snapshot = InputSnapshot()
+
+    def bind_key(self, action: Action, *keys: int):
+        for key in keys:
+            self.key_bindings.setdefault(key, set()).add(action)
+
+    def bind_mouse_button(self, action: Action, *buttons: int):
+        for button in buttons:
+            self.mouse_button_bindings.setdefault(button, set()).add(action)
+
+    def unbind(self, action: Action):
+        for bindings in (self.key_bindings, self.mouse_button_bindings):
+            for actions in bindings.values():
+                actions.discard(action)
+
+    def update(
+        self,
+        events: Iterable[pygame.event.Event],
+        pressed_keys: Optional[Sequence[bool]] = None,
+    ) -> InputSnapshot:
+        """Build this frame's snapshot from `events` and `pressed_keys` (default: `pygame.key.get_pressed()`)."""
+        if pressed_keys is None:
+            pressed_keys = pygame.key.get_pressed()
+        triggered = set()
+        released = set()
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                triggered.update(self.key_bindings.get(event.key, ()))
+            elif event.type == pygame.KEYUP:
+                released.update(self.key_bindings.get(event.key, ()))
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                triggered.update(self.mouse_button_bindings.get(event.button, ()))
+            elif event.type == pygame.MOUSEBUTTONUP:
+                released.update(self.mouse_button_bindings.get(event.button, ()))
+        held = set()
+        for key, actions in self.key_bindings.items():
+            if actions and pressed_keys[key]:
+                held.update(actions)
+        self.snapshot = InputSnapshot(
+            frozenset(held), frozenset(triggered), frozenset(released)
+        )
+        return self.snapshot
@@ -1,29 +1,138 @@
-from typing import Optional
+import os
+from typing import Callable, Optional
 import pygame
 
 from mergic import SceneManager, Scene
+from mergic.presenter import DisplayPresenter, Sdl2Presenter
+from mergic.telemetry import FrameTelemetry
+from mergic.replay import (
+    FrameTiming,
+    InputRecorder,
+    load_recording,
+    pressed_bound_keys,
+    replay,
+    write_timings,
+)
 
 
-def basic_mainloop(scenes: dict[str, Scene], screen_size=(640, 360), px_scale=1, caption: Optional[str]=None, fps=60):
+class FixedTimestep:
+    """Accumulator turning variable frame times into a whole number of fixed simulation steps.
+
+    At most `max_steps` steps are run per frame; time beyond that is dropped (and added to
+    `dropped_time`) so that a slow frame can't make the following frames ever slower.
+    """
+
+    def __init__(self, tick_rate: int, max_steps: int = 5):
+        if tick_rate <= 0 or max_steps <= 0:
+            raise ValueError(f"Invalid tick rate or max steps: {tick_rate}, {max_steps}")
+        self.step = 1000 / tick_rate  # milliseconds
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    def advance(self, dt) -> int:
+        """Add the frame time `dt` (milliseconds) and return how many steps to simulate."""
+        self.accumulator += dt
+        steps = min(int(self.accumulator // self.step), self.max_steps)
+        self.accumulator -= steps * self.step
+        if self.accumulator >= self.step:
+            remainder = self.accumulator % self.step
+            self.dropped_time += self.accumulator - remainder
+            self.accumulator = remainder
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """Fraction of a step accumulated but not simulated yet, for render interpolation."""
+        return self.accumulator / self.step
+
+
+def run_frame(scene_manager: SceneManager, dt, fixed_timestep: Optional[FixedTimestep] = None, telemetry: Optional[FrameTelemetry] = None):
+    """Update `scene_manager` for one frame: `update(dt)`,
+    or with `fixed_timestep`, the due `fixed_update` steps followed by `render(alpha)`.
+    Laps the "update" (and "render") phases of `telemetry`."""
+    if fixed_timestep is None:
+        scene_manager.update(dt)
+        if telemetry is not None:
+            telemetry.lap("update")
+        return
+    scene_manager.switch_to_pending_scene()
+    for _ in range(fixed_timestep.advance(dt)):
+        scene_manager.fixed_update(fixed_timestep.step)
+    if telemetry is not None:
+        telemetry.lap("update")
+    scene_manager.render(fixed_timestep.alpha)
+    if telemetry is not None:
+        telemetry.lap("render")
+
+
+def basic_mainloop(scenes: dict[str, Scene], screen_size=(640, 360), px_scale=1, caption: Optional[str]=None, fps=60, record_input: Optional[str | os.PathLike]=None, tick_rate: Optional[int]=None, max_catch_up_steps=5, telemetry: Optional[FrameTelemetry]=None, presenter_type: Callable[..., DisplayPresenter | Sdl2Presenter]=DisplayPresenter):
+    """`record_input`: path of a recording file to write the frames' input and dt to (see `mergic.replay`).\n
+    `tick_rate`: if given, scenes are simulated with `Scene.fixed_update` at this many ticks per second
+    (at most `max_catch_up_steps` per frame) and drawn with `Scene.render`, while `fps` only caps rendering.\n
+    Scenes reporting dirty rects (`Scene.take_dirty_rects`) only get those regions presented.\n
+    `telemetry`: records each frame's "events", "update", "render" and "present" times;
+    in variable dt mode drawing done in `Scene.update` counts as "update".\n
+    `presenter_type`: called with `(screen_size, caption)` to create what puts `screen` on the window,
+    e.g. `Sdl2Presenter` or `functools.partial(Sdl2Presenter, software=True)` to scale with SDL."""
     pygame.init()
     clock = pygame.time.Clock()
-    screen_size = (640, 360)
-    display = pygame.display.set_mode(screen_size)
-    if caption:
-        pygame.display.set_caption(caption)
+    presenter = presenter_type(screen_size, caption)
     screen = pygame.surface.Surface([size // px_scale for size in screen_size])
     scene_manager = SceneManager(scenes=scenes, screen=screen)
+    recorder = InputRecorder(record_input) if record_input else None
+    fixed_timestep = FixedTimestep(tick_rate, max_catch_up_steps) if tick_rate else None
     running = True
     dt = 0
     while running:
-        for event in pygame.event.get():
+        if telemetry is not None:
+            telemetry.begin_frame()
+        events = pygame.event.get()
+        if recorder:
+            recorder.record_frame(dt, events, pressed_bound_keys(scene_manager))
+        scene_manager.input.update(events)
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             scene_manager.handle_event(event)
-        scene_manager.update(dt)
-        pygame.transform.scale(
-            screen, screen_size, display
-        )  # 3rd argument does display.blit()
-        pygame.display.flip()
+        if telemetry is not None:
+            telemetry.lap("events")
+        run_frame(scene_manager, dt, fixed_timestep, telemetry)
+        presenter.present(screen, scene_manager.take_dirty_rects())
+        if telemetry is not None:
+            telemetry.lap("present")
         dt = clock.tick(fps)  # milliseconds
+        if telemetry is not None:
+            telemetry.end_frame()
+    if recorder:
+        recorder.close()
+    scene_manager.shutdown()
+    presenter.close()
+    pygame.quit()
+
+
+def replay_mainloop(scenes: dict[str, Scene], recording: str | os.PathLike, screen_size=(640, 360), px_scale=1, timings_path: Optional[str | os.PathLike]=None, tick_rate: Optional[int]=None, max_catch_up_steps=5, presenter_type: Callable[..., DisplayPresenter | Sdl2Presenter]=DisplayPresenter) -> list[FrameTiming]:
+    """Run `scenes` on the frames recorded by `basic_mainloop(record_input=...)` as fast as possible.\n
+    Pass the `tick_rate` and `max_catch_up_steps` the recording was made with.
+    Returns the per-frame timings and writes them as CSV to `timings_path` if given."""
+    pygame.init()
+    presenter = presenter_type(screen_size, None)
+    screen = pygame.surface.Surface([size // px_scale for size in screen_size])
+    scene_manager = SceneManager(scenes=scenes, screen=screen)
+    fixed_timestep = FixedTimestep(tick_rate, max_catch_up_steps) if tick_rate else None
+
+    def present():
+        presenter.present(screen, scene_manager.take_dirty_rects())
+
+    timings = replay(
+        scene_manager,
+        load_recording(recording),
+        present,
+        lambda dt: run_frame(scene_manager, dt, fixed_timestep),
+    )
+    if timings_path:
+        write_timings(timings, timings_path)
+    scene_manager.shutdown()
+    presenter.close()
     pygame.quit()
+    return timings
@@ -0,0 +1,147 @@
+"""Presenting the low-res `screen` that scenes draw to on the window."""
+
+import os
+from typing import Optional, Sequence
+
+import pygame
+
+
+class DisplayPresenter:
+    """Scales `screen` onto the display surface with `pygame.transform.scale`.
+
+    Given dirty rects (in `screen` coordinates), only those regions are scaled and passed to
+    `pygame.display.update`. Without them, with more than `max_dirty_rects` of them,
+    if they cover more than `max_dirty_fraction` of the screen, or if the display size is not
+    a whole multiple of the screen size (where scaling regions separately would leave seams
+    against a full scale), the whole screen is scaled and flipped.
+    """
+
+    def __init__(
+        self,
+        screen_size: Sequence[int],
+        caption: Optional[str] = None,
+        max_dirty_rects: int = 32,
+        max_dirty_fraction: float = 0.5,
+    ):
+        self.display = pygame.display.set_mode(screen_size)
+        if caption:
+            pygame.display.set_caption(caption)
+        self.max_dirty_rects = max_dirty_rects
+        self.max_dirty_fraction = max_dirty_fraction
+
+    def present(
+        self,
+        screen: pygame.Surface,
+        dirty_rects: Optional[Sequence[pygame.Rect]] = None,
+    ):
+        display_width, display_height = self.display.get_size()
+        screen_rect = screen.get_rect()
+        if dirty_rects is None or len(dirty_rects) > self.max_dirty_rects:
+            self.present_full(screen)
+            return
+        rects = [rect for rect in map(screen_rect.clip, dirty_rects) if rect]
+        if not rects:
+            return
+        if (
+            display_width % screen_rect.width
+            or display_height % screen_rect.height
+            or sum(rect.width * rect.height for rect in rects)
+            > self.max_dirty_fraction * screen_rect.width * screen_rect.height
+        ):
+            self.present_full(screen)
+            return
+        scale_x = display_width // screen_rect.width
+        scale_y = display_height // screen_rect.height
+        updated_rects = []
+        for rect in rects:
+            target = pygame.Rect(
+                rect.x * scale_x, rect.y * scale_y, rect.w * scale_x, rect.h * scale_y
+            )
+            pygame.transform.scale(
+                screen.subsurface(rect), target.size, self.display.subsurface(target)
+            )
+            updated_rects.append(target)
+        pygame.display.update(updated_rects)
+
+    def present_full(self, screen: pygame.Surface):
+        pygame.transform.scale(
+            screen, self.display.get_size(), self.display
+        )  # 3rd argument does display.blit()
+        pygame.display.flip()
+
+    def close(self):
+        pass
+
+
+class Sdl2Presenter:
+    """Uploads `screen` to a streaming texture and lets an SDL renderer scale it onto the window.
+
+    Drop-in replacement of `DisplayPresenter` built on `pygame._sdl2.video`: scenes keep drawing
+    to the same `screen` surface, but the upscaling is done by SDL
+    (on the GPU, or by SDL's own software renderer with `software=True`) with nearest-neighbour
+    filtering. With `integer_scaling` the screen is scaled by the largest whole factor fitting
+    the window and centered, otherwise it is stretched to fit the window keeping its aspect ratio.
+    Dirty rects only limit which parts of the texture are uploaded; nothing is uploaded or
+    presented when there are none.
+    """
+
+    def __init__(
+        self,
+        screen_size: Sequence[int],
+        caption: Optional[str] = None,
+        software: bool = False,
+        integer_scaling: bool = True,
+        vsync: bool = False,
+    ):
+        from pygame._sdl2 import video
+
+        # Read by SDL when the texture is created.
+        os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "nearest")
+        self.window = video.Window(caption or "pygame window", size=screen_size)
+        self.renderer = video.Renderer(
+            self.window, accelerated=0 if software else 1, vsync=vsync
+        )
+        self.integer_scaling = integer_scaling
+        self.texture = None
+        self._texture_size: Optional[tuple[int, int]] = None
+        self._video = video
+
+    def _target_rect(self, screen_size: tuple[int, int]) -> pygame.Rect:
+        window_width, window_height = self.window.size
+        width, height = screen_size
+        scale = min(window_width / width, window_height / height)
+        if self.integer_scaling:
+            scale = max(1, int(scale))
+        rect = pygame.Rect(0, 0, round(width * scale), round(height * scale))
+        rect.center = (window_width // 2, window_height // 2)
+        return rect
+
+    def present(
+        self,
+        screen: pygame.Surface,
+        dirty_rects: Optional[Sequence[pygame.Rect]] = None,
+    ):
+        screen_size = screen.get_size()
+        if screen_size != self._texture_size:
+            self.texture = self._video.Texture(self.renderer, screen_size, streaming=True)
+            self._texture_size = screen_size
+            dirty_rects = None
+        if dirty_rects is None:
+            self.texture.update(screen)
+        else:
+            screen_rect = screen.get_rect()
+            rects = [rect for rect in map(screen_rect.clip, dirty_rects) if rect]
+            if not rects:
+                return
+            for rect in rects:
+                self.texture.update(screen.subsurface(rect), rect)
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+        self.texture.draw(dstrect=self._target_rect(screen_size))
+        self.renderer.present()
+
+    def close(self):
+        self.texture = None
+        self._texture_size = None
+        self.renderer = None
+        self.window.destroy()
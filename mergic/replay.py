@@ -0,0 +1,162 @@
+"""Record the input that a main loop feeds to a `SceneManager` and replay it without a clock.
+
+A recording is a JSON-lines file with one line per frame:
+the `dt` passed to `SceneManager.update`, the frame's pygame events,
+and the keys bound in `SceneManager.input` that were held down.
+Event attributes that are not plain JSON values (e.g. window objects) are dropped.
+"""
+
+from dataclasses import dataclass, field
+import csv
+import json
+import os
+import time
+from typing import Callable, Iterable, Optional
+
+import pygame
+
+from mergic import SceneManager
+
+_JSON_SCALARS = (bool, int, float, str, type(None))
+
+
+def _event_to_dict(event: pygame.event.Event) -> dict:
+    attributes = {}
+    for name, value in event.dict.items():
+        if isinstance(value, _JSON_SCALARS):
+            attributes[name] = value
+        elif isinstance(value, (tuple, list)) and all(
+            isinstance(item, _JSON_SCALARS) for item in value
+        ):
+            attributes[name] = list(value)
+    return {"type": event.type, "attributes": attributes}
+
+
+def _event_from_dict(data: dict) -> pygame.event.Event:
+    attributes = {
+        name: tuple(value) if isinstance(value, list) else value
+        for name, value in data["attributes"].items()
+    }
+    return pygame.event.Event(data["type"], attributes)
+
+
+@dataclass
+class RecordedFrame:
+    dt: float
+    events: list[pygame.event.Event] = field(default_factory=list)
+    pressed_keys: frozenset[int] = frozenset()
+
+
+class InputRecorder:
+    """Appends frames to a recording file. Use as a context manager or call `close`."""
+
+    def __init__(self, filepath: str | os.PathLike):
+        self.file = open(filepath, "w", encoding="utf-8")
+        self.frame_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record_frame(
+        self,
+        dt: float,
+        events: Iterable[pygame.event.Event],
+        pressed_keys: Iterable[int] = (),
+    ):
+        self.file.write(
+            json.dumps(
+                {
+                    "dt": dt,
+                    "events": [_event_to_dict(event) for event in events],
+                    "pressed_keys": sorted(pressed_keys),
+                },
+                separators=(",", ":"),
+            )
+        )
+        self.file.write("\n")
+        self.frame_count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def pressed_bound_keys(scene_manager: SceneManager) -> list[int]:
+    """Keys bound in `scene_manager.input` that are currently held down."""
+    pressed = pygame.key.get_pressed()
+    return [key for key in scene_manager.input.key_bindings if pressed[key]]
+
+
+def load_recording(filepath: str | os.PathLike) -> list[RecordedFrame]:
+    frames = []
+    with open(filepath, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            frames.append(
+                RecordedFrame(
+                    data["dt"],
+                    [_event_from_dict(event) for event in data["events"]],
+                    frozenset(data["pressed_keys"]),
+                )
+            )
+    return frames
+
+
+class _KeyState(dict):
+    def __missing__(self, key):
+        return False
+
+
+@dataclass
+class FrameTiming:
+    frame: int
+    dt: float
+    update_ns: int
+    present_ns: int = 0
+
+
+def replay(
+    scene_manager: SceneManager,
+    frames: Iterable[RecordedFrame],
+    present: Optional[Callable[[], None]] = None,
+    update: Optional[Callable[[float], None]] = None,
+) -> list[FrameTiming]:
+    """Feed recorded frames to `scene_manager` back to back and time each of them.\n
+    `update_ns` covers input mapping, event handling and `update(dt)`
+    (default: `scene_manager.update`); `present_ns` covers `present`.
+    """
+    if update is None:
+        update = scene_manager.update
+    timings = []
+    for frame_number, frame in enumerate(frames):
+        start = time.perf_counter_ns()
+        scene_manager.input.update(
+            frame.events, _KeyState.fromkeys(frame.pressed_keys, True)
+        )
+        for event in frame.events:
+            scene_manager.handle_event(event)
+        update(frame.dt)
+        updated = time.perf_counter_ns()
+        if present is not None:
+            present()
+        timings.append(
+            FrameTiming(
+                frame_number,
+                frame.dt,
+                updated - start,
+                time.perf_counter_ns() - updated,
+            )
+        )
+    return timings
+
+
+def write_timings(timings: Iterable[FrameTiming], filepath: str | os.PathLike):
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("frame", "dt", "update_ns", "present_ns"))
+        for timing in timings:
+            writer.writerow((timing.frame, timing.dt, timing.update_ns, timing.present_ns))
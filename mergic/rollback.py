@@ -0,0 +1,247 @@
+from collections import deque
+from dataclasses import dataclass, field
+import io
+import pickle
+import sys
+from typing import Iterable, Optional
+
+import pygame
+
+from mergic import ECS
+
+
+@dataclass
+class _TickDelta:
+    tick: int
+    changed: dict[int, bytes] = field(default_factory=dict)  # handle: pickled entity
+    deleted: set[int] = field(default_factory=set)
+    previous: dict[int, Optional[bytes]] = field(
+        default_factory=dict
+    )  # handle: pickled entity before this tick, None if it did not exist
+
+
+class _EntityPickler(pickle.Pickler):
+    def __init__(self, file, shared_objects: dict[int, object]):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.shared_objects = shared_objects
+
+    def persistent_id(self, obj):
+        if isinstance(obj, pygame.Surface):
+            self.shared_objects[id(obj)] = obj
+            return id(obj)
+        return None
+
+    def reducer_override(self, obj):
+        if (soa := sys.modules.get("mergic.soa")) is not None and isinstance(
+            obj, soa.ArrayRowView
+        ):
+            return obj.data.copy().__reduce__()
+        return NotImplemented
+
+
+class _EntityUnpickler(pickle.Unpickler):
+    def __init__(self, file, shared_objects: dict[int, object]):
+        super().__init__(file)
+        self.shared_objects = shared_objects
+
+    def persistent_load(self, pid):
+        return self.shared_objects[pid]
+
+
+def _slot_names(cls: type):
+    for klass in cls.__mro__:
+        slots = getattr(klass, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__"):
+                yield name
+
+
+class RollbackBuffer:
+    """Ring buffer of the entity state of `world` over its last `capacity` recorded ticks.
+
+    Every `record` pickles entities keyed by their handle
+    and stores only the entities whose pickled state changed since the previous record,
+    plus the handles deleted since then, along with their previous state.
+    `restore` walks these deltas backward from the latest record,
+    so its cost grows with the number of entities changed since the restored tick, not with the world size.
+    Surfaces are treated as immutable shared assets: they are referenced, not copied.
+    Maps are not recorded.
+
+    Change ticks are tracked for `tracked_components` (`ECS.track_changes`; by default `object`, i.e. any component).
+    After the first record only entities added, deleted or replaced since the previous record,
+    or flagged with `ECS.mark_changed`, are pickled; changes not flagged are missed.
+    Entities flagged at the world tick of the previous record are pickled again.
+    With `tracked_components=None` every live entity is pickled on every `record` and compared on `restore`,
+    which catches unflagged changes at a cost proportional to the world size.
+    """
+
+    def __init__(
+        self,
+        world: ECS,
+        capacity: int = 60,
+        tracked_components: Optional[Iterable[type]] = (object,),
+    ):
+        self.world = world
+        self.tracked_components = (
+            None if tracked_components is None else tuple(tracked_components)
+        )
+        if self.tracked_components:
+            world.track_changes(*self.tracked_components)
+        self._recorded_world_tick = world.tick
+        self.deltas: deque[_TickDelta] = deque()
+        self.capacity = capacity
+        self._latest: dict[int, bytes] = {}  # state at the newest delta
+        self._shared_objects: dict[int, object] = {}
+        self._buffer = io.BytesIO()
+        self._pickler = _EntityPickler(self._buffer, self._shared_objects)
+
+    @property
+    def ticks(self) -> list[int]:
+        return [delta.tick for delta in self.deltas]
+
+    def _pickle_entity(self, entity: object) -> bytes:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._pickler.clear_memo()
+        self._pickler.dump(entity)
+        return self._buffer.getvalue()
+
+    def _unpickle_entity(self, data: bytes) -> object:
+        return _EntityUnpickler(io.BytesIO(data), self._shared_objects).load()
+
+    def _changed_handles(self, since_tick: int) -> set[int]:
+        """Handles flagged, added, deleted or replaced at or after `since_tick`."""
+        world = self.world
+        handles = set(world.handles_changed_structurally(since_tick))
+        for component_type in self.tracked_components:
+            for entity in world.entities_for_changed_components(
+                component_type, since_tick=since_tick
+            ):
+                handles.add(world.handle_for(entity))
+        return handles
+
+    def record(self, tick: Optional[int] = None) -> int:
+        """Record the current entity state as `tick` (default: `world.tick`)."""
+        if tick is None:
+            tick = self.world.tick
+        if self.deltas and tick <= self.deltas[-1].tick:
+            raise ValueError(f"Tick {tick} is not after the last recorded tick")
+        world = self.world
+        latest = self._latest
+        delta = _TickDelta(tick)
+        if self.tracked_components and self.deltas:
+            for handle in self._changed_handles(self._recorded_world_tick):
+                entity = world.entity_for_handle(handle)
+                if entity is None:
+                    if handle in latest:
+                        delta.previous[handle] = latest.pop(handle)
+                        delta.deleted.add(handle)
+                    continue
+                data = self._pickle_entity(entity)
+                if latest.get(handle) != data:
+                    delta.previous[handle] = latest.get(handle)
+                    delta.changed[handle] = data
+                    latest[handle] = data
+            world.forget_structural_changes(self._recorded_world_tick)
+        else:
+            alive = set()
+            for handle, entity in world.entities_with_handles():
+                alive.add(handle)
+                data = self._pickle_entity(entity)
+                if latest.get(handle) != data:
+                    delta.previous[handle] = latest.get(handle)
+                    delta.changed[handle] = data
+                    latest[handle] = data
+            delta.deleted = latest.keys() - alive
+            for handle in delta.deleted:
+                delta.previous[handle] = latest.pop(handle)
+        self._recorded_world_tick = world.tick
+        self.deltas.append(delta)
+        if len(self.deltas) > self.capacity:
+            self.deltas.popleft()
+        return tick
+
+    def _check_recorded(self, tick: int):
+        if not any(delta.tick == tick for delta in self.deltas):
+            raise ValueError(f"Tick {tick} is not in the buffer (recorded: {self.ticks})")
+
+    def state_at(self, tick: int) -> dict[int, bytes]:
+        """Return the pickled entities recorded at `tick` by handle."""
+        self._check_recorded(tick)
+        state = dict(self._latest)
+        for delta in reversed(self.deltas):
+            if delta.tick == tick:
+                return state
+            for handle, data in delta.previous.items():
+                if data is None:
+                    del state[handle]
+                else:
+                    state[handle] = data
+
+    def restore(self, tick: int):
+        """Put the entities of `world` back into their state at `tick` and drop later ticks.\n
+        Entities still alive keep their identity and are updated in place,
+        including changes made after the latest `record`.
+        Entities added since `tick` are deleted and entities deleted since then are re-added.
+        """
+        self._check_recorded(tick)
+        world = self.world
+        latest = self._latest
+        later_deltas = []
+        for delta in reversed(self.deltas):
+            if delta.tick == tick:
+                break
+            later_deltas.append(delta)
+        if self.tracked_components:
+            candidates = self._changed_handles(self._recorded_world_tick)
+        else:
+            candidates = set(latest)
+            candidates.update(handle for handle, _ in world.entities_with_handles())
+        for delta in later_deltas:
+            candidates.update(delta.previous)
+        # Undo the later deltas, newest first, for the candidates only.
+        state = {handle: latest.get(handle) for handle in candidates}
+        for delta in later_deltas:
+            state.update(delta.previous)
+        for handle, data in state.items():
+            if data is None and (entity := world.entity_for_handle(handle)) is not None:
+                world.delete_now(entity)
+        restored_entities = []
+        for handle, data in state.items():
+            if data is None:
+                latest.pop(handle, None)
+                continue
+            latest[handle] = data
+            entity = world.entity_for_handle(handle)
+            if entity is not None and self._pickle_entity(entity) == data:
+                continue
+            snapshot_entity = self._unpickle_entity(data)
+            if entity is not None and entity.__class__ is snapshot_entity.__class__:
+                self._copy_state(entity, snapshot_entity)
+                restored_entities.append(entity)
+                continue
+            if entity is not None:
+                world.delete_now(entity)
+            world._add_with_handle(snapshot_entity, handle)
+        for _ in later_deltas:
+            self.deltas.pop()
+        world.tick = tick
+        self._recorded_world_tick = tick
+        if getattr(world, "spatial_index", None) is not None:
+            world.sync_spatial_index(restored_entities)
+
+    @staticmethod
+    def _copy_state(target: object, source: object):
+        soa = sys.modules.get("mergic.soa")
+        names = list(_slot_names(source.__class__))
+        names.extend(getattr(source, "__dict__", {}).keys())
+        for name in names:
+            if not hasattr(source, name):
+                continue
+            value = getattr(source, name)
+            if soa is not None and isinstance(
+                current := getattr(target, name, None), soa.ArrayRowView
+            ):
+                current[:] = value
+            else:
+                setattr(target, name, value)
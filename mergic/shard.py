@@ -0,0 +1,229 @@
+"""Simulate background maps of a `GameWorld` in worker processes.
+
+A shard owns one map and the entities moved there with it. Every tick the main process
+sends `dt` to all idle shards at once; each shard runs its systems, applies its command buffer
+and answers with the events its systems posted with `GameWorld.post_event` and an optional summary.
+`MapShards.tick` never waits for the workers: it returns the reports that have arrived since
+the previous call (usually those of the previous tick), and a shard still busy with an earlier
+tick gets the elapsed time added to its next one.
+Systems and `summarize` are sent to the worker by pickling, so they must be module-level functions.
+"""
+
+from dataclasses import dataclass
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from mergic import GameWorld
+from mergic import snapshot
+
+
+@dataclass
+class ShardSystem:
+    name: str
+    fn: Callable[[GameWorld, float], None]
+    reads: tuple[type, ...] = ()
+    writes: tuple[type, ...] = ()
+
+
+@dataclass
+class ShardReport:
+    map_name: str
+    tick: int
+    events: list[Any]
+    summary: Any = None
+
+
+def _run_shard(
+    connection: Connection,
+    map_name: str,
+    world_data: bytes,
+    systems: list[ShardSystem],
+    summarize: Optional[Callable[[GameWorld], Any]],
+):
+    world: GameWorld = snapshot.loads(world_data, restricted=False)
+    for system in systems:
+        world.add_system(system.name, system.fn, system.reads, system.writes)
+    while True:
+        command, payload = connection.recv()
+        match command:
+            case "tick":
+                world.run_systems(payload)
+                world.apply_commands()
+                world.inbox.clear()
+                world.advance_tick()
+                events = world.outbox
+                world.outbox = []
+                connection.send(
+                    ShardReport(
+                        map_name,
+                        world.tick,
+                        events,
+                        summarize(world) if summarize else None,
+                    )
+                )
+            case "event":
+                world.inbox.append(payload)
+            case "reclaim":
+                connection.send(snapshot.dumps(world))
+                break
+            case "stop":
+                break
+    connection.close()
+
+
+class _Shard:
+    def __init__(self, process: multiprocessing.Process, connection: Connection):
+        self.process = process
+        self.connection = connection
+        self.busy = False  # a tick was sent and its report not received yet
+        self.pending_dt = 0  # time elapsed while busy, simulated with the next tick
+
+
+class MapShards:
+    """Worker processes simulating maps offloaded from `world`."""
+
+    def __init__(self, world: GameWorld, mp_context=None):
+        self.world = world
+        self.mp_context = mp_context or multiprocessing.get_context()
+        self.shards: dict[str, _Shard] = {}
+        self.last_reports: dict[str, ShardReport] = {}
+        self.failed: dict[str, Optional[int]] = {}  # map name: exit code of its dead worker
+        self._received: list[ShardReport] = []
+
+    def offload(
+        self,
+        map_name: str,
+        entities: Iterable[object],
+        systems: Iterable[ShardSystem] = (),
+        summarize: Optional[Callable[[GameWorld], Any]] = None,
+    ):
+        """Move the map `map_name` and `entities` out of `world` into a new worker process.\n
+        The entities are deleted from `world` (and dropped from its pending deletions);
+        inside the shard they get new handles. Nothing is changed if any entity is not in `world`.
+        """
+        if map_name in self.shards:
+            raise ValueError(f"Map '{map_name}' is already offloaded")
+        if map_name not in self.world.maps:
+            raise KeyError(map_name)
+        entities = list(entities)
+        entity_ids = set()
+        for entity in entities:
+            if id(entity) not in self.world._handles or id(entity) in entity_ids:
+                raise ValueError(f"{entity!r} is not in the world or given twice")
+            entity_ids.add(id(entity))
+        for entity in entities:
+            self.world.commands.deletes.pop(id(entity), None)
+            self.world.delete_now(entity)
+        game_map = self.world.maps.pop(map_name)
+        shard_world = GameWorld(self.world.stable_order)
+        shard_world.set_map(map_name, game_map)
+        shard_world.add_many(entities)
+        parent_connection, child_connection = self.mp_context.Pipe()
+        process = self.mp_context.Process(
+            target=_run_shard,
+            args=(
+                child_connection,
+                map_name,
+                snapshot.dumps(shard_world),
+                list(systems),
+                summarize,
+            ),
+            name=f"mergic-shard-{map_name}",
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        self.shards[map_name] = _Shard(process, parent_connection)
+
+    def tick(self, dt) -> list[ShardReport]:
+        """Start advancing every idle shard by `dt` (plus the time it missed while busy)
+        and return the reports received since the previous call, without waiting."""
+        reports = self.collect()
+        for map_name, shard in list(self.shards.items()):
+            shard.pending_dt += dt
+            if shard.busy:
+                continue
+            try:
+                shard.connection.send(("tick", shard.pending_dt))
+            except OSError:
+                self._fail(map_name)
+                continue
+            shard.busy = True
+            shard.pending_dt = 0
+        return reports
+
+    def collect(self, timeout: Optional[float] = 0) -> list[ShardReport]:
+        """Return the reports of shards that finished their tick,
+        waiting up to `timeout` seconds (forever if None) for the busy ones."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        reports, self._received = self._received, []
+        while busy := {
+            shard.connection: map_name
+            for map_name, shard in self.shards.items()
+            if shard.busy
+        }:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            ready = wait(list(busy), remaining)
+            if not ready:
+                break
+            for connection in ready:
+                map_name = busy[connection]
+                try:
+                    report = connection.recv()
+                except (EOFError, OSError):
+                    self._fail(map_name)
+                    continue
+                self.shards[map_name].busy = False
+                self.last_reports[map_name] = report
+                reports.append(report)
+        return reports
+
+    def _fail(self, map_name: str):
+        """Forget the shard of `map_name` whose worker died; its map and entities are lost."""
+        shard = self.shards.pop(map_name)
+        self.last_reports.pop(map_name, None)
+        shard.connection.close()
+        shard.process.join(1)
+        self.failed[map_name] = shard.process.exitcode
+
+    def send_event(self, map_name: str, event: Any):
+        """Deliver `event` to the `inbox` of the shard world, available to its systems on the next tick."""
+        self.shards[map_name].connection.send(("event", event))
+
+    def reclaim(self, map_name: str) -> list[int]:
+        """Stop the shard and move its map and entities back into `world`.
+        Returns the entities' new handles in `world`."""
+        shard = self.shards.pop(map_name)
+        self.last_reports.pop(map_name, None)
+        if shard.busy:
+            # Its events are still returned by the next `tick`/`collect`.
+            self._received.append(shard.connection.recv())
+        shard.connection.send(("reclaim", None))
+        shard_world: GameWorld = snapshot.loads(
+            shard.connection.recv(), restricted=False
+        )
+        shard.process.join()
+        shard.connection.close()
+        self.world.set_map(map_name, shard_world.maps[map_name])
+        entities = [entity for _, entity in shard_world.entities_with_handles()]
+        for entity in entities:
+            shard_world.delete_now(entity)
+        return self.world.add_many(entities)
+
+    def close(self):
+        for shard in self.shards.values():
+            try:
+                shard.connection.send(("stop", None))
+                # Drain a report still in flight so the worker isn't blocked sending it.
+                while shard.connection.poll(1):
+                    shard.connection.recv()
+            except (EOFError, OSError):
+                pass
+            shard.process.join(1)
+            if shard.process.is_alive():
+                shard.process.terminate()
+                shard.process.join()
+            shard.connection.close()
+        self.shards.clear()
@@ -0,0 +1,320 @@
+"""Struct-of-arrays storage for numeric entity attributes.
+
+This module requires NumPy. It is imported only when `ECS.declare_numeric_components` is used.
+"""
+
+import types
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import numpy.typing as npt
+import pygame
+
+_VECTOR_TYPES = {2: pygame.Vector2, 3: pygame.Vector3}
+
+
+class ArrayRowView:
+    """A thin, Vector2-like view of one entity's row in a `ComponentArrays` field.
+
+    Reads and writes go straight to the shared array, so vectorized updates on
+    `ComponentArrays` are visible through the entity attribute and vice versa.
+    Once the entity is deleted from its store the view is detached and keeps a private copy.
+
+    Binary operators and the non-mutating methods below work on a `copy` and return a new
+    `pygame.Vector2`/`Vector3` (a NumPy array for other lengths), like `pos + vel` would with
+    vectors. In-place operators (`+=`, `-=`, `*=`), item and `x`/`y` assignment and `update`
+    write through to the array.
+    """
+
+    __slots__ = ("_owner", "_name", "_row", "_data")
+
+    def __init__(self, owner: "ComponentArrays", name: str, row: int):
+        self._owner: Optional[ComponentArrays] = owner
+        self._name = name
+        self._row = row
+        self._data: Optional[np.ndarray] = None
+
+    @property
+    def data(self) -> np.ndarray:
+        if self._owner is None:
+            return self._data
+        return self._owner.arrays[self._name][self._row]
+
+    @property
+    def x(self):
+        return self.data[0]
+
+    @x.setter
+    def x(self, value):
+        self.data[0] = value
+
+    @property
+    def y(self):
+        return self.data[1]
+
+    @y.setter
+    def y(self, value):
+        self.data[1] = value
+
+    def detach(self):
+        self._data = self.data.copy()
+        self._owner = None
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.data
+        return self.data.astype(dtype)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.data.tolist())
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __setitem__(self, index, value):
+        self.data[index] = value
+
+    def __iadd__(self, other):
+        self.data[:] += other
+        return self
+
+    def __isub__(self, other):
+        self.data[:] -= other
+        return self
+
+    def __imul__(self, other):
+        self.data[:] *= other
+        return self
+
+    def copy(self) -> pygame.Vector2 | pygame.Vector3 | np.ndarray:
+        """A detached copy of the current value."""
+        values = self.data.tolist()
+        if (vector_type := _VECTOR_TYPES.get(len(values))) is None:
+            return np.array(values)
+        return vector_type(values)
+
+    def update(self, *args):
+        """Set the value, e.g. `update(x, y)` or `update(other_vector)`."""
+        self.data[:] = args[0] if len(args) == 1 else args
+
+    def length(self) -> float:
+        return self.copy().length()
+
+    def length_squared(self) -> float:
+        return self.copy().length_squared()
+
+    def distance_to(self, other) -> float:
+        return self.copy().distance_to(other)
+
+    def distance_squared_to(self, other) -> float:
+        return self.copy().distance_squared_to(other)
+
+    def dot(self, other) -> float:
+        return self.copy().dot(other)
+
+    def normalize(self):
+        return self.copy().normalize()
+
+    def __add__(self, other):
+        return self.copy() + other
+
+    def __radd__(self, other):
+        return other + self.copy()
+
+    def __sub__(self, other):
+        return self.copy() - other
+
+    def __rsub__(self, other):
+        return other - self.copy()
+
+    def __mul__(self, other):
+        return self.copy() * other
+
+    def __rmul__(self, other):
+        return other * self.copy()
+
+    def __truediv__(self, other):
+        return self.copy() / other
+
+    def __neg__(self):
+        return -self.copy()
+
+    def __eq__(self, other) -> bool:
+        try:
+            return bool(np.array_equal(self.data, np.asarray(other)))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.data.tolist()!r})"
+
+
+class NumericField:
+    """Data descriptor standing for a numeric attribute on an entity type with numeric storage.
+
+    The entity keeps its `ArrayRowView` in the original slot (or `__dict__`), but assigning
+    to the attribute, e.g. `entity.pos = Vector2(1, 2)` or `entity.hp -= 1`, writes the value
+    into the view instead of replacing it. Scalar fields (length 1) read as a Python float.
+    Entities without a view (e.g. of the same type in another world) behave as without it.
+    """
+
+    __slots__ = ("name", "scalar", "_slot")
+
+    def __init__(self, name: str, scalar: bool, slot: Optional[types.MemberDescriptorType]):
+        self.name = name
+        self.scalar = scalar
+        self._slot = slot
+
+    def raw_get(self, entity: object):
+        if self._slot is not None:
+            return self._slot.__get__(entity)
+        try:
+            return entity.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def raw_set(self, entity: object, value):
+        if self._slot is not None:
+            self._slot.__set__(entity, value)
+        else:
+            entity.__dict__[self.name] = value
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        value = self.raw_get(entity)
+        if self.scalar and type(value) is ArrayRowView:
+            return value.data[0].item()
+        return value
+
+    def __set__(self, entity, value):
+        try:
+            current = self.raw_get(entity)
+        except AttributeError:
+            current = None
+        if type(current) is ArrayRowView:
+            current.update(value)
+        else:
+            self.raw_set(entity, value)
+
+
+def install_numeric_field(entity_type: type, name: str, size: int):
+    """Put a `NumericField` for `name` on `entity_type` unless it (or a base) already has one."""
+    attr = None
+    for klass in entity_type.__mro__:
+        if name in klass.__dict__:
+            attr = klass.__dict__[name]
+            break
+    if isinstance(attr, NumericField):
+        return
+    slot = attr if isinstance(attr, types.MemberDescriptorType) else None
+    setattr(entity_type, name, NumericField(name, size == 1, slot))
+
+
+def _store_view(entity: object, name: str, view: ArrayRowView):
+    if isinstance(field := getattr(type(entity), name, None), NumericField):
+        field.raw_set(entity, view)
+    else:
+        setattr(entity, name, view)
+
+
+class ComponentArrays:
+    """Contiguous arrays for the numeric attributes of one entity type.
+
+    Row `i` of every field belongs to the entity at index `i` of the owning `EntityStore`.
+    Indexing by field name returns a view over the live rows, so in-place NumPy operations
+    such as `arrays["pos"] += arrays["vel"] * dt` update every entity of the type at once.
+    """
+
+    def __init__(
+        self,
+        fields: dict[str, int],
+        dtype: npt.DTypeLike = np.float64,
+        capacity: int = 64,
+    ):
+        self.dtype = dtype
+        self.fields: dict[str, int] = {}  # attribute name: vector length
+        self.arrays: dict[str, np.ndarray] = {}
+        self.count = 0
+        self._capacity = capacity
+        self._row_views: list[list[ArrayRowView]] = []
+        for name, size in fields.items():
+            self.add_field(name, size, ())
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name][: self.count]
+
+    def __setitem__(self, name: str, values):
+        self.arrays[name][: self.count] = values
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add_field(self, name: str, size: int, entities: Iterable[object]):
+        """Add a field after construction, moving `entities` (the store's entities in row order) into it."""
+        self.fields[name] = size
+        self.arrays[name] = np.zeros((self._capacity, size), dtype=self.dtype)
+        for row, entity in enumerate(entities):
+            self.arrays[name][row] = getattr(entity, name)
+            view = ArrayRowView(self, name, row)
+            self._row_views[row].append(view)
+            _store_view(entity, name, view)
+
+    def reserve(self, capacity: int):
+        if capacity <= self._capacity:
+            return
+        for name, array in self.arrays.items():
+            grown = np.zeros((capacity, self.fields[name]), dtype=self.dtype)
+            grown[: self.count] = array[: self.count]
+            self.arrays[name] = grown
+        self._capacity = capacity
+
+    def append(self, entity: object):
+        if self.count == self._capacity:
+            self.reserve(self._capacity * 2)
+        row = self.count
+        views = []
+        for name in self.fields:
+            self.arrays[name][row] = getattr(entity, name)
+            view = ArrayRowView(self, name, row)
+            views.append(view)
+            _store_view(entity, name, view)
+        self._row_views.append(views)
+        self.count += 1
+
+    def swap_remove(self, row: int):
+        """Remove `row` by moving the last row into it, mirroring `EntityStore.remove`."""
+        for view in self._row_views[row]:
+            view.detach()
+        last_row = self.count - 1
+        last_views = self._row_views.pop()
+        if row != last_row:
+            for array in self.arrays.values():
+                array[row] = array[last_row]
+            for view in last_views:
+                view._row = row
+            self._row_views[row] = last_views
+        self.count -= 1
+
+    def delete_rows(self, rows: Iterable[int]):
+        """Remove `rows` keeping the remaining rows in order."""
+        rows = sorted(set(rows))
+        for row in rows:
+            for view in self._row_views[row]:
+                view.detach()
+        keep = np.ones(self.count, dtype=bool)
+        keep[rows] = False
+        new_count = int(keep.sum())
+        for array in self.arrays.values():
+            array[:new_count] = array[: self.count][keep]
+        dead_rows = set(rows)
+        self._row_views = [
+            views for row, views in enumerate(self._row_views) if row not in dead_rows
+        ]
+        for row, views in enumerate(self._row_views):
+            for view in views:
+                view._row = row
+        self.count = new_count
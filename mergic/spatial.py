@@ -0,0 +1,154 @@
+import heapq
+import math
+from typing import Iterable, Optional, Sequence
+
+import pygame
+
+
+class SpatialHash:
+    """Uniform-grid spatial index of entities by 2D position.
+
+    Entities are bucketed into square cells of `cell_size`.
+    Queries only visit the cells overlapping the queried area,
+    and moving an entity within its cell only updates its stored position.
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError(f"Invalid cell size: {cell_size}")
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], dict[int, object]] = {}
+        self._entries: dict[
+            int, tuple[tuple[int, int], float, float, object]
+        ] = {}  # id(entity): (cell, x, y, entity)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        for _, _, _, entity in self._entries.values():
+            yield entity
+
+    def __contains__(self, entity: object) -> bool:
+        return id(entity) in self._entries
+
+    def cell_for(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, entity: object, pos: Sequence[float]):
+        if id(entity) in self._entries:
+            raise ValueError(f"{entity!r} is already indexed")
+        x, y = pos[0], pos[1]
+        cell = self.cell_for(x, y)
+        self.cells.setdefault(cell, {})[id(entity)] = entity
+        self._entries[id(entity)] = (cell, x, y, entity)
+
+    def move(self, entity: object, pos: Sequence[float]):
+        old_cell = self._entries[id(entity)][0]
+        x, y = pos[0], pos[1]
+        cell = self.cell_for(x, y)
+        if cell != old_cell:
+            self._remove_from_cell(old_cell, id(entity))
+            self.cells.setdefault(cell, {})[id(entity)] = entity
+        self._entries[id(entity)] = (cell, x, y, entity)
+
+    def remove(self, entity: object):
+        cell = self._entries.pop(id(entity))[0]
+        self._remove_from_cell(cell, id(entity))
+
+    def _remove_from_cell(self, cell: tuple[int, int], entity_id: int):
+        bucket = self.cells[cell]
+        del bucket[entity_id]
+        if not bucket:
+            del self.cells[cell]
+
+    def _entries_in_cells(self, left: int, top: int, right: int, bottom: int):
+        for cell_x in range(left, right + 1):
+            for cell_y in range(top, bottom + 1):
+                if bucket := self.cells.get((cell_x, cell_y)):
+                    for entity_id in bucket:
+                        yield self._entries[entity_id]
+
+    def query_rect(self, rect: pygame.Rect | Sequence[float]) -> list[object]:
+        """Return entities positioned inside `rect` (x, y, width, height), right and bottom edges excluded."""
+        x, y, width, height = rect
+        left, top = self.cell_for(x, y)
+        right, bottom = self.cell_for(x + width, y + height)
+        return [
+            entity
+            for _, entity_x, entity_y, entity in self._entries_in_cells(
+                left, top, right, bottom
+            )
+            if x <= entity_x < x + width and y <= entity_y < y + height
+        ]
+
+    def query_radius(self, center: Sequence[float], radius: float) -> list[object]:
+        """Return entities within `radius` of `center`."""
+        center_x, center_y = center[0], center[1]
+        left, top = self.cell_for(center_x - radius, center_y - radius)
+        right, bottom = self.cell_for(center_x + radius, center_y + radius)
+        squared_radius = radius * radius
+        return [
+            entity
+            for _, x, y, entity in self._entries_in_cells(left, top, right, bottom)
+            if (x - center_x) ** 2 + (y - center_y) ** 2 <= squared_radius
+        ]
+
+    def nearest(
+        self,
+        point: Sequence[float],
+        k: int = 1,
+        max_distance: Optional[float] = None,
+    ) -> list[object]:
+        """Return up to `k` entities nearest to `point`, nearest first.\n
+        Cells are searched in rings around `point` until no unvisited cell can hold a closer entity.
+        Once a ring would have more cells than are occupied, the remaining occupied cells are
+        scanned directly instead, so far-away queries cost at most one pass over the occupied cells."""
+        point_x, point_y = point[0], point[1]
+        center_x, center_y = self.cell_for(point_x, point_y)
+        candidates: list[tuple[float, int, object]] = []
+
+        def add_candidates(bucket: dict[int, object]):
+            for entity_id, entity in bucket.items():
+                _, x, y, _ = self._entries[entity_id]
+                candidates.append(
+                    ((x - point_x) ** 2 + (y - point_y) ** 2, entity_id, entity)
+                )
+
+        visited = 0
+        ring = 0
+        while visited < len(self._entries):
+            if 8 * ring > len(self.cells):
+                for (cell_x, cell_y), bucket in self.cells.items():
+                    if max(abs(cell_x - center_x), abs(cell_y - center_y)) >= ring:
+                        add_candidates(bucket)
+                break
+            for cell in self._ring_cells(center_x, center_y, ring):
+                if bucket := self.cells.get(cell):
+                    add_candidates(bucket)
+                    visited += len(bucket)
+            # Entities in unvisited cells are at least this far from `point`.
+            searched_distance = ring * self.cell_size
+            if max_distance is not None and searched_distance > max_distance:
+                break
+            if len(candidates) >= k:
+                kth_squared_distance = heapq.nsmallest(k, candidates)[-1][0]
+                if kth_squared_distance <= searched_distance**2:
+                    break
+            ring += 1
+        if max_distance is not None:
+            squared_max_distance = max_distance * max_distance
+            candidates = [c for c in candidates if c[0] <= squared_max_distance]
+        return [entity for _, _, entity in heapq.nsmallest(k, candidates)]
+
+    @staticmethod
+    def _ring_cells(center_x: int, center_y: int, ring: int) -> Iterable[tuple[int, int]]:
+        if ring == 0:
+            yield (center_x, center_y)
+            return
+        for x in range(center_x - ring, center_x + ring + 1):
+            yield (x, center_y - ring)
+            yield (x, center_y + ring)
+        for y in range(center_y - ring + 1, center_y + ring):
+            yield (center_x - ring, y)
+            yield (center_x + ring, y)
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import os
+import sys
+from typing import Any, Callable, Iterable, Optional
+
+
+@dataclass
+class System:
+    """A function run once per `SystemScheduler.run` call as `fn(world, dt)`.
+
+    Attributes:
+        reads: component types the system only reads.
+        writes: component types the system modifies.
+            Two systems conflict when one writes a component type the other reads or writes.
+    """
+
+    name: str
+    fn: Callable[[Any, float], None]
+    reads: frozenset[type] = field(default_factory=frozenset)
+    writes: frozenset[type] = field(default_factory=frozenset)
+
+    def conflicts_with(self, other: "System") -> bool:
+        return bool(
+            self.writes & (other.reads | other.writes) or other.writes & self.reads
+        )
+
+
+def _gil_enabled() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+class SystemScheduler:
+    """Runs registered systems in stages of mutually non-conflicting systems.
+
+    A system depends on every earlier-registered system it conflicts with,
+    and is placed in the stage after the last of them, so conflicting systems
+    always run in registration order.
+    Systems within a stage run concurrently on a thread pool when `max_workers` > 1.
+    By default that is only the case on free-threaded Python builds; otherwise every stage runs sequentially.
+    Systems must not add or delete entities while they may run concurrently.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        if max_workers is None:
+            max_workers = 1 if _gil_enabled() else (os.cpu_count() or 1)
+        self.max_workers = max_workers
+        self.systems: dict[str, System] = {}
+        self._stages: Optional[list[list[System]]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[Any, float], None],
+        reads: Iterable[type] = (),
+        writes: Iterable[type] = (),
+    ):
+        if name in self.systems:
+            raise ValueError(f"System '{name}' is already registered")
+        self.systems[name] = System(name, fn, frozenset(reads), frozenset(writes))
+        self._stages = None
+
+    def remove(self, name: str):
+        del self.systems[name]
+        self._stages = None
+
+    @property
+    def stages(self) -> list[list[System]]:
+        if self._stages is None:
+            self._stages = self._build_stages()
+        return self._stages
+
+    def _build_stages(self) -> list[list[System]]:
+        stage_for_system: dict[str, int] = {}
+        stages: list[list[System]] = []
+        registered: list[System] = []
+        for system in self.systems.values():
+            stage = 0
+            for earlier in registered:
+                if system.conflicts_with(earlier):
+                    stage = max(stage, stage_for_system[earlier.name] + 1)
+            stage_for_system[system.name] = stage
+            if stage == len(stages):
+                stages.append([])
+            stages[stage].append(system)
+            registered.append(system)
+        return stages
+
+    def schedule(self) -> list[list[str]]:
+        """Return system names grouped by stage, in execution order."""
+        return [[system.name for system in stage] for stage in self.stages]
+
+    def describe(self) -> str:
+        mode = (
+            f"parallel(max_workers={self.max_workers})"
+            if self.max_workers > 1
+            else "sequential"
+        )
+        lines = [f"SystemScheduler: {mode}"]
+        for i, names in enumerate(self.schedule()):
+            lines.append(f"  stage {i}: {', '.join(names)}")
+        return "\n".join(lines)
+
+    def run(self, world, dt):
+        for stage in self.stages:
+            if self.max_workers > 1 and len(stage) > 1:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers)
+                futures = [
+                    self._executor.submit(system.fn, world, dt) for system in stage
+                ]
+                for future in futures:
+                    future.result()
+            else:
+                for system in stage:
+                    system.fn(world, dt)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,135 @@
+"""Frame-time telemetry cheap enough to leave enabled.
+
+Timings are written into preallocated arrays (one ring buffer per phase),
+so recording a frame costs a few `perf_counter_ns` calls and array stores.
+Percentiles, hitch counts and exports are only computed when asked for.
+"""
+
+from array import array
+import csv
+import json
+import os
+import time
+from typing import Iterable
+
+PHASES = ("events", "update", "render", "present")
+
+
+class FrameTelemetry:
+    """Ring buffer of the last `capacity` frames' phase times in nanoseconds.
+
+    Per frame: `begin_frame()`, then `lap(phase)` after each phase (time since the previous
+    lap or `begin_frame`), then `end_frame()`. Phases not lapped in a frame count as 0.
+    The frame time spans `begin_frame` to `end_frame`; frames longer than
+    `hitch_threshold_ms` are counted as hitches.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 3600,
+        phases: Iterable[str] = PHASES,
+        hitch_threshold_ms: float = 1000 / 30,
+    ):
+        if capacity <= 0:
+            raise ValueError(f"Invalid capacity: {capacity}")
+        self.capacity = capacity
+        self.phases = tuple(phases)
+        self.hitch_threshold_ns = int(hitch_threshold_ms * 1_000_000)
+        self.phase_times = {
+            phase: array("q", bytes(8 * capacity)) for phase in self.phases
+        }
+        self.frame_times = array("q", bytes(8 * capacity))
+        self.frame_count = 0
+        self.hitch_count = 0
+        self._index = 0
+        self._frame_start = 0
+        self._last_lap = 0
+
+    def begin_frame(self):
+        index = self._index
+        for times in self.phase_times.values():
+            times[index] = 0
+        self._frame_start = self._last_lap = time.perf_counter_ns()
+
+    def lap(self, phase: str):
+        now = time.perf_counter_ns()
+        self.phase_times[phase][self._index] += now - self._last_lap
+        self._last_lap = now
+
+    def end_frame(self):
+        frame_time = time.perf_counter_ns() - self._frame_start
+        self.frame_times[self._index] = frame_time
+        if frame_time > self.hitch_threshold_ns:
+            self.hitch_count += 1
+        self.frame_count += 1
+        self._index = (self._index + 1) % self.capacity
+
+    def __len__(self) -> int:
+        """Number of frames currently held in the buffer."""
+        return min(self.frame_count, self.capacity)
+
+    def _ordered(self, times: array) -> list[int]:
+        if self.frame_count < self.capacity:
+            return times[: self.frame_count].tolist()
+        return times[self._index :].tolist() + times[: self._index].tolist()
+
+    def samples(self, phase: str = "frame") -> list[int]:
+        """Buffered times of `phase` (or of whole frames), oldest first."""
+        return self._ordered(
+            self.frame_times if phase == "frame" else self.phase_times[phase]
+        )
+
+    @staticmethod
+    def _percentile(sorted_samples: list[int], percent: float) -> int:
+        # Nearest-rank percentile.
+        rank = max(1, -(-len(sorted_samples) * percent // 100))
+        return sorted_samples[int(rank) - 1]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """p50/p95/p99/max in milliseconds of each phase and of whole frames, over the buffer,
+        plus the hitches in the buffer and since the start."""
+        summary = {}
+        for phase in (*self.phases, "frame"):
+            samples = sorted(self.samples(phase))
+            if not samples:
+                summary[phase] = {}
+                continue
+            summary[phase] = {
+                "p50": self._percentile(samples, 50) / 1_000_000,
+                "p95": self._percentile(samples, 95) / 1_000_000,
+                "p99": self._percentile(samples, 99) / 1_000_000,
+                "max": samples[-1] / 1_000_000,
+            }
+        summary["hitches"] = {
+            "buffered": sum(
+                frame_time > self.hitch_threshold_ns
+                for frame_time in self.samples("frame")
+            ),
+            "total": self.hitch_count,
+        }
+        return summary
+
+    def write_csv(self, filepath: str | os.PathLike):
+        """Write the buffered frames, one row per frame with its phase times in nanoseconds."""
+        first_frame = self.frame_count - len(self)
+        columns = [self.samples(phase) for phase in (*self.phases, "frame")]
+        with open(filepath, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame", *(f"{phase}_ns" for phase in self.phases), "frame_ns"))
+            for offset, row in enumerate(zip(*columns)):
+                writer.writerow((first_frame + offset, *row))
+
+    def write_json(self, filepath: str | os.PathLike):
+        """Write `summary()` and the buffered samples."""
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "frame_count": self.frame_count,
+                    "hitch_threshold_ns": self.hitch_threshold_ns,
+                    "summary": self.summary(),
+                    "samples_ns": {
+                        phase: self.samples(phase) for phase in (*self.phases, "frame")
+                    },
+                },
+                f,
+            )
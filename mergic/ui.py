@@ -10,6 +10,7 @@ import pygame
 import pygame.freetype
 
 from mergic import TextMenu
+from mergic.input import InputMapper, InputSnapshot
 
 
 class UI:
@@ -122,6 +123,24 @@ class MenuUI(UI):
             action = self.control_map[event.type].get(event.button)
         else:
             action = None
+        self.do_action(action)
+
+    def bind_controls(self, input_mapper: InputMapper):
+        """Bind the keys and buttons of `control_map` to `MenuUIAction`s in `input_mapper`."""
+        for key, action in self.control_map[pygame.KEYDOWN].items():
+            input_mapper.bind_key(action, key)
+        for button, action in self.control_map[pygame.MOUSEBUTTONDOWN].items():
+            input_mapper.bind_mouse_button(action, button)
+
+    def handle_input(self, snapshot: InputSnapshot):
+        """Alternative to `handle_event`: act on the `MenuUIAction`s triggered this frame."""
+        if not self.is_focused:
+            return
+        for action in MenuUIAction:
+            if action in snapshot.triggered:
+                self.do_action(action)
+
+    def do_action(self, action: Optional[MenuUIAction]):
         if action == MenuUIAction.SELECTOR_UP:
             self.menu.selector_up()
         elif action == MenuUIAction.SELECTOR_DOWN:
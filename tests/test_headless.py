@@ -0,0 +1,82 @@
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+import pygame
+
+from mergic import Scene
+from mergic.headless import main, run_headless
+
+
+class CountingScene(Scene):
+    updates = 0
+
+    def update(self, dt):
+        CountingScene.updates += 1
+        self.screen.fill((0, 0, 255))
+
+
+class TestHeadless(unittest.TestCase):
+    def setUp(self):
+        CountingScene.updates = 0
+
+    def test_run_headless(self):
+        telemetry = run_headless(CountingScene, frames=5, screen_size=(64, 32))
+        self.assertEqual(CountingScene.updates, 5)
+        self.assertEqual(len(telemetry), 5)
+        self.assertTrue(all(sample > 0 for sample in telemetry.samples("present")))
+        self.assertFalse(pygame.get_init())
+
+    def test_environment_is_restored(self):
+        with mock.patch.dict(os.environ, {"SDL_VIDEODRIVER": "x11"}):
+            os.environ.pop("SDL_AUDIODRIVER", None)
+            run_headless(CountingScene, frames=1, screen_size=(8, 8))
+            self.assertEqual(os.environ["SDL_VIDEODRIVER"], "x11")
+            self.assertNotIn("SDL_AUDIODRIVER", os.environ)
+
+    def test_fixed_tick_rate(self):
+        run_headless(
+            {"main": CountingScene()}, frames=3, screen_size=(8, 8), dt=50, tick_rate=40
+        )
+        self.assertEqual(CountingScene.updates, 6)
+
+    def test_sdl2_software_presenter(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main(
+                [
+                    "tests.test_headless:CountingScene",
+                    "--frames",
+                    "3",
+                    "--presenter",
+                    "sdl2-software",
+                ]
+            )
+        self.assertEqual(CountingScene.updates, 3)
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = Path(tmpdir) / "timings.json"
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                main(
+                    [
+                        "tests.test_headless:CountingScene",
+                        "--frames",
+                        "4",
+                        "--screen-size",
+                        "16",
+                        "16",
+                        "--json",
+                        str(json_path),
+                    ]
+                )
+            with open(json_path) as f:
+                data = json.load(f)
+        self.assertEqual(data["frame_count"], 4)
+        self.assertIn("frame", json.loads(stdout.getvalue()))
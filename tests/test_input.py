@@ -0,0 +1,65 @@
+from collections import defaultdict
+import unittest
+
+import pygame
+
+from mergic import TextMenu
+from mergic.input import InputMapper
+from mergic.ui import MenuUI, MenuUIAction
+
+
+def key_state(*keys):
+    return defaultdict(bool, {key: True for key in keys})
+
+
+class TestInputMapper(unittest.TestCase):
+    def test_held_triggered_released(self):
+        mapper = InputMapper()
+        mapper.bind_key("left", pygame.K_LEFT, pygame.K_a)
+        mapper.bind_key("right", pygame.K_RIGHT)
+        mapper.bind_mouse_button("fire", pygame.BUTTON_LEFT)
+        snapshot = mapper.update(
+            [
+                pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a),
+                pygame.event.Event(pygame.KEYUP, key=pygame.K_RIGHT),
+                pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=pygame.BUTTON_LEFT),
+                pygame.event.Event(pygame.KEYDOWN, key=pygame.K_z),
+            ],
+            key_state(pygame.K_a),
+        )
+        self.assertIs(mapper.snapshot, snapshot)
+        self.assertEqual(snapshot.held, {"left"})
+        self.assertEqual(snapshot.triggered, {"left", "fire"})
+        self.assertEqual(snapshot.released, {"right"})
+        self.assertEqual(snapshot.axis("left", "right"), -1)
+        snapshot = mapper.update([], key_state(pygame.K_LEFT, pygame.K_RIGHT))
+        self.assertEqual(snapshot.triggered, set())
+        self.assertEqual(snapshot.axis("left", "right"), 0)
+
+    def test_unbind(self):
+        mapper = InputMapper()
+        mapper.bind_key("jump", pygame.K_SPACE)
+        mapper.bind_key("confirm", pygame.K_SPACE)
+        mapper.unbind("jump")
+        snapshot = mapper.update([], key_state(pygame.K_SPACE))
+        self.assertEqual(snapshot.held, {"confirm"})
+
+    def test_menuui_handle_input(self):
+        menu = TextMenu()
+        for text in ("a", "b", "c"):
+            menu.add_option(text)
+        menuui = MenuUI(menu, None, pos=(0, 0))
+        mapper = InputMapper()
+        menuui.bind_controls(mapper)
+        events = [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_DOWN)]
+        menuui.handle_input(mapper.update(events, key_state()))
+        self.assertEqual(menu.selector, 0)
+        menuui.focus()
+        menuui.handle_input(mapper.update(events, key_state()))
+        self.assertEqual(menu.selector, 1)
+        events = [
+            pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=pygame.BUTTON_WHEELUP)
+        ]
+        menuui.handle_input(mapper.update(events, key_state()))
+        self.assertEqual(menu.selector, 0)
+        self.assertIn(MenuUIAction.SELECTOR_UP, mapper.snapshot.triggered)
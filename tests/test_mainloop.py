@@ -0,0 +1,53 @@
+import unittest
+
+from mergic import Scene, SceneManager
+from mergic.mainloop_template import FixedTimestep, run_frame
+
+
+class CountingScene(Scene):
+    def setup(self):
+        self.steps = []
+        self.alphas = []
+
+    def fixed_update(self, dt):
+        self.steps.append(dt)
+
+    def render(self, alpha):
+        self.alphas.append(alpha)
+
+
+class TestFixedTimestep(unittest.TestCase):
+    def test_advance_accumulates(self):
+        fixed_timestep = FixedTimestep(tick_rate=100)
+        self.assertEqual(fixed_timestep.advance(5), 0)
+        self.assertAlmostEqual(fixed_timestep.alpha, 0.5)
+        self.assertEqual(fixed_timestep.advance(16), 2)
+        self.assertAlmostEqual(fixed_timestep.alpha, 0.1)
+
+    def test_catch_up_is_capped(self):
+        fixed_timestep = FixedTimestep(tick_rate=100, max_steps=3)
+        self.assertEqual(fixed_timestep.advance(1005), 3)
+        self.assertAlmostEqual(fixed_timestep.alpha, 0.5)
+        self.assertAlmostEqual(fixed_timestep.dropped_time, 970)
+        self.assertEqual(fixed_timestep.advance(10), 1)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            FixedTimestep(0)
+
+    def test_run_frame(self):
+        scene = CountingScene()
+        scene_manager = SceneManager({"main": scene})
+        fixed_timestep = FixedTimestep(tick_rate=50)
+        for dt in (0, 30, 30):
+            run_frame(scene_manager, dt, fixed_timestep)
+        self.assertEqual(scene.steps, [20, 20, 20])
+        self.assertEqual(scene.alphas, [0, 0.5, 0])
+
+    def test_fixed_update_defaults_to_update(self):
+        dts = []
+        scene = Scene()
+        scene.update = dts.append
+        scene_manager = SceneManager({"main": scene})
+        run_frame(scene_manager, 25, FixedTimestep(tick_rate=100))
+        self.assertEqual(dts, [10, 10])
@@ -1,8 +1,21 @@
 from dataclasses import dataclass
 from typing import get_args
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import threading
 import unittest
 
-from mergic import ECS, TextMenu, GameWorld
+from pygame.math import Vector2
+
+from mergic import (
+    ActionController,
+    ActionSet,
+    ECS,
+    GameWorld,
+    Prefab,
+    TextMenu,
+    handle_index,
+)
 
 
 @dataclass
@@ -15,6 +28,27 @@ class DummyComponent2:
     pass
 
 
+@dataclass
+class DummyMovable:
+    pos: Vector2
+    vel: Vector2
+
+
+@dataclass(slots=True)
+class DummyMovableEntity(DummyMovable):
+    pass
+
+
+@dataclass
+class DummyHP:
+    hp: float
+
+
+@dataclass(slots=True)
+class DummyHPEntity(DummyMovable, DummyHP):
+    pass
+
+
 @dataclass(slots=True)
 class DummyEntity(DummyComponent):
     pass
@@ -107,6 +141,326 @@ class TestECS(unittest.TestCase):
         )
 
 
+    def test_entities_for_components_cached_before_types_exist(self):
+        world = ECS()
+        self.assertEqual(list(world.entities_for_components(DummyComponent2)), [])
+        entity = DummyEntity2()
+        world.add(DummyEntity())
+        world.add(entity)
+        self.assertEqual(list(world.entities_for_components(DummyComponent2)), [entity])
+
+    def test_reserve_to_delete_same_entity_twice(self):
+        world = ECS()
+        entities = [DummyEntity() for _ in range(3)]
+        for entity in entities:
+            world.add(entity)
+        world.reserve_to_delete(entities[0])
+        world.reserve_to_delete(entities[0])
+        world.reserve_to_delete(entities[2])
+        world.do_reserved_deletions()
+        self.assertEqual(list(world.entities_for_type(DummyEntity)), [entities[1]])
+        self.assertEqual(len(world.dead_entity_buffer), 0)
+
+    def test_delete_keeps_insertion_order_with_stable_order(self):
+        entities = [DummyEntity() for _ in range(5)]
+        unstable_world = ECS()
+        stable_world = ECS(stable_order=True)
+        for world in (unstable_world, stable_world):
+            for entity in entities:
+                world.add(entity)
+            world.delete_now(entities[1])
+            world.reserve_to_delete(entities[3])
+            world.do_reserved_deletions()
+            self.assertCountEqual(
+                list(world.entities_for_type(DummyEntity)),
+                [entities[0], entities[2], entities[4]],
+            )
+        self.assertEqual(
+            list(stable_world.entities_for_type(DummyEntity)),
+            [entities[0], entities[2], entities[4]],
+        )
+        with self.assertRaises(ValueError):
+            stable_world.delete_now(entities[1])
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "requires numpy")
+    def test_numeric_components(self):
+        world = ECS()
+        first = DummyMovableEntity(pos=Vector2(0, 0), vel=Vector2(1, 2))
+        world.add(first)
+        world.declare_numeric_components(DummyMovable, pos=2, vel=2)
+        second = DummyMovableEntity(pos=Vector2(10, 10), vel=Vector2(-1, 0))
+        world.add(second)
+        for arrays in world.component_arrays(DummyMovable):
+            arrays["pos"] += arrays["vel"] * 2
+        self.assertEqual((first.pos.x, first.pos.y), (2, 4))
+        self.assertEqual(list(second.pos), [8, 10])
+        world.delete_now(first)
+        first.pos.x = 100
+        second.pos.y += 1
+        self.assertEqual(list(second.pos), [8, 11])
+        self.assertEqual(list(next(world.component_arrays(DummyMovable))["pos"][0]), [8, 11])
+        self.assertEqual(second.pos + second.vel, Vector2(7, 11))
+        self.assertEqual(Vector2(1, 1) - second.pos, Vector2(-7, -10))
+        self.assertEqual(second.pos * 2, Vector2(16, 22))
+        self.assertEqual(second.vel / 2, Vector2(-0.5, 0))
+        self.assertEqual(second.pos.distance_to((8, 14)), 3)
+        position = second.pos.copy()
+        second.pos.update(0, 0)
+        self.assertEqual(position, Vector2(8, 11))
+        self.assertEqual(list(second.pos), [0, 0])
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "requires numpy")
+    def test_numeric_component_assignment_and_scalars(self):
+        world = ECS()
+        entity = DummyHPEntity(pos=Vector2(1, 2), vel=Vector2(3, 4), hp=10)
+        world.add(entity)
+        world.declare_numeric_components(DummyMovable, pos=2, vel=2)
+        world.declare_numeric_components(DummyHP, hp=1)
+        entity.pos = Vector2(100, 100)
+        entity.hp -= 3
+        for arrays in world.component_arrays(DummyMovable):
+            arrays["pos"] += arrays["vel"]
+        self.assertEqual(entity.pos, Vector2(103, 104))
+        self.assertEqual(entity.hp, 7)
+        self.assertIsInstance(entity.hp, float)
+        self.assertTrue(entity.hp > 0)
+        self.assertEqual(int(entity.hp), 7)
+        for arrays in world.component_arrays(DummyHP):
+            arrays["hp"] -= 7
+        self.assertLessEqual(entity.hp, 0)
+        world.delete_now(entity)
+        entity.hp = 5
+        self.assertEqual(entity.hp, 5)
+        plain = DummyHPEntity(pos=Vector2(), vel=Vector2(), hp=1)
+        plain.hp = 2
+        self.assertEqual(plain.hp, 2)
+
+    def test_entity_handles(self):
+        world = ECS()
+        entity = DummyEntity()
+        handle = world.add(entity)
+        self.assertIs(world.entity_for_handle(handle), entity)
+        self.assertEqual(world.handle_for(entity), handle)
+        with self.assertRaises(ValueError):
+            world.add(entity)
+        world.delete_now(entity)
+        self.assertFalse(world.is_alive(handle))
+        new_entity = DummyEntity2()
+        new_handle = world.add(new_entity)
+        self.assertEqual(handle_index(new_handle), handle_index(handle))
+        self.assertNotEqual(new_handle, handle)
+        self.assertIsNone(world.entity_for_handle(handle))
+        self.assertIs(world.entity_for_handle(new_handle), new_entity)
+        world.reserve_to_delete(new_entity)
+        world.do_reserved_deletions()
+        self.assertFalse(world.is_alive(new_handle))
+
+    def test_entities_for_changed_components(self):
+        world = ECS()
+        entities = [DummyEntity2() for _ in range(3)]
+        world.add(entities[0])
+        world.track_changes(DummyComponent, DummyComponent2)
+        world.add(entities[1])
+        self.assertCountEqual(
+            world.entities_for_changed_components(DummyComponent), entities[:2]
+        )
+        world.advance_tick()
+        self.assertEqual(world.entities_for_changed_components(DummyComponent), [])
+        world.add(entities[2])
+        world.mark_changed(entities[0], DummyComponent2)
+        self.assertCountEqual(
+            world.entities_for_changed_components(DummyComponent2),
+            [entities[0], entities[2]],
+        )
+        self.assertEqual(
+            world.entities_for_changed_components(DummyComponent), [entities[2]]
+        )
+        self.assertCountEqual(
+            world.entities_for_changed_components(DummyComponent, since_tick=0),
+            entities,
+        )
+        world.delete_now(entities[2])
+        self.assertEqual(
+            world.entities_for_changed_components(DummyComponent2), [entities[0]]
+        )
+
+    def test_any_component_changes_and_structural_changes(self):
+        world = ECS()
+        entities = [DummyEntity2() for _ in range(3)]
+        handles = world.add_many(entities[:2])
+        world.track_changes(object)
+        self.assertCountEqual(
+            world.entities_for_changed_components(object), entities[:2]
+        )
+        world.advance_tick()
+        world.mark_changed(entities[0], DummyComponent2)
+        self.assertEqual(world.entities_for_changed_components(object), [entities[0]])
+        world.delete_now(entities[1])
+        new_handle = world.add(entities[2])
+        self.assertCountEqual(
+            world.handles_changed_structurally(), [handles[1], new_handle]
+        )
+        world.advance_tick()
+        self.assertEqual(world.handles_changed_structurally(), [])
+        world.forget_structural_changes(world.tick)
+        self.assertEqual(world.handles_changed_structurally(since_tick=0), [])
+
+    def test_spawn_prefab(self):
+        world = ECS()
+        world.register_prefab(
+            "movable",
+            Prefab(
+                DummyMovableEntity,
+                factories={"pos": Vector2, "vel": lambda: Vector2(1, 0)},
+            ),
+        )
+        handles = world.spawn(
+            "movable", 3, overrides=lambda i: {"vel": Vector2(i, i)}
+        )
+        entities = [world.entity_for_handle(handle) for handle in handles]
+        self.assertEqual([entity.vel for entity in entities], [Vector2(i, i) for i in range(3)])
+        self.assertIsNot(entities[0].pos, entities[1].pos)
+        defaults = [
+            world.entity_for_handle(handle) for handle in world.spawn("movable", 2)
+        ]
+        self.assertEqual(len(world.entities[DummyMovableEntity]), 5)
+        self.assertEqual(defaults[0].vel, Vector2(1, 0))
+        self.assertIsNot(defaults[0].vel, defaults[1].vel)
+        entity = DummyEntity()
+        with self.assertRaises(ValueError):
+            world.add_many([entity, entity])
+
+    def test_entities_for_components_without_and_optional(self):
+        world = ECS()
+        entity = DummyEntity()
+        entity2 = DummyEntity2()
+        world.add(entity)
+        self.assertEqual(
+            list(world.entities_for_components(DummyComponent, without=(DummyComponent2,))),
+            [entity],
+        )
+        world.add(entity2)
+        world.add(DummyMovableEntity(Vector2(), Vector2()))
+        self.assertEqual(
+            list(world.entities_for_components(DummyComponent, without=(DummyComponent2,))),
+            [entity],
+        )
+        self.assertCountEqual(
+            list(world.entities_for_components(DummyComponent, optional=(DummyComponent2,))),
+            [(entity, (False,)), (entity2, (True,))],
+        )
+
+    def test_concurrent_queries_assign_distinct_component_bits(self):
+        world = ECS()
+        world.add(DummyEntity())
+        component_types = [type(f"Component{i}", (), {}) for i in range(64)]
+        barrier = threading.Barrier(8)
+
+        def query(offset):
+            barrier.wait()
+            for component_type in component_types[offset::8]:
+                list(world.entities_for_components(DummyComponent, without=(component_type,)))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(query, range(8)))
+        bits = [world._component_bits[component_type] for component_type in component_types]
+        self.assertEqual(len(set(bits)), len(component_types))
+        self.assertEqual(len(world._entity_types_for_query), len(component_types))
+
+    def test_entity_pool(self):
+        def reset(entity, pos, vel):
+            entity.pos.update(pos)
+            entity.vel.update(vel)
+
+        world = ECS()
+        world.enable_pool(DummyMovableEntity, reset, max_size=1)
+        handles = [
+            world.acquire(DummyMovableEntity, pos=Vector2(i, i), vel=Vector2())
+            for i in range(2)
+        ]
+        first, second = [world.entity_for_handle(handle) for handle in handles]
+        world.delete_now(first)
+        world.reserve_to_delete(second)
+        world.do_reserved_deletions()
+        handle = world.acquire(DummyMovableEntity, pos=Vector2(5, 5), vel=Vector2(1, 1))
+        self.assertIs(world.entity_for_handle(handle), first)
+        self.assertEqual(first.pos, Vector2(5, 5))
+        stats = world.pool_stats(DummyMovableEntity)
+        self.assertEqual(
+            (stats.hits, stats.misses, stats.released, stats.discarded, stats.size),
+            (1, 2, 1, 1, 0),
+        )
+
+    def test_stats(self):
+        world = GameWorld()
+        self.assertIsNone(world.stats_snapshot())
+        world.enable_stats()
+        world.add(DummyEntity())
+        world.add_many([DummyEntity2(), DummyEntity2()])
+        for _ in range(2):
+            list(world.entities_for_components(DummyComponent))
+        world.reserve_to_delete(next(world.entities_for_type(DummyEntity2)))
+        world.do_reserved_deletions()
+        world.end_stats_frame()
+        stats = world.stats_snapshot()
+        query_stats = stats.queries[((DummyComponent,), (), ())]
+        self.assertEqual((query_stats.calls, query_stats.entities_yielded), (2, 6))
+        self.assertEqual(stats.last_frame_adds, {DummyEntity: 1, DummyEntity2: 2})
+        self.assertEqual(stats.last_frame_deletes, {DummyEntity2: 1})
+        self.assertEqual(stats.adds, {})
+        world.disable_stats()
+        self.assertNotIn("entities_for_components", vars(world))
+        self.assertEqual(len(list(world.entities_for_components(DummyComponent))), 2)
+
+    def test_apply_commands(self):
+        world = ECS()
+        entities = [DummyEntity() for _ in range(3)]
+        handles = world.add_many(entities)
+        for entity in world.entities_for_components(DummyComponent):
+            world.commands.spawn(DummyEntity2())
+            world.reserve_to_delete(entity)
+        world.commands.replace(entities[0], replaced := DummyEntity3())
+        world.commands.deletes.pop(id(entities[0]))
+        world.commands.replace(entities[1], DummyEntity3())
+        self.assertEqual(len(world.entities[DummyEntity]), 3)
+        world.apply_commands()
+        self.assertEqual(len(world.commands), 0)
+        self.assertEqual(len(world.entities[DummyEntity]), 0)
+        self.assertEqual(len(world.entities[DummyEntity2]), 3)
+        self.assertEqual(list(world.entities_for_type(DummyEntity3)), [replaced])
+        self.assertIs(world.entity_for_handle(handles[0]), replaced)
+        self.assertFalse(world.is_alive(handles[1]))
+
+
+class TestActionController(unittest.TestCase):
+    def test_string_api(self):
+        controller = ActionController()
+        controller.add_action("jump", {"height": 2})
+        controller.add_action("jump", {"height": 3})
+        self.assertFalse(controller.is_active("jump"))
+        controller.do("jump")
+        self.assertTrue(controller.is_active("jump"))
+        controller.mutable_property("jump")["height"] += 1
+        self.assertEqual(controller.actions, {"jump": {"active": True, "property": {"height": 3}}})
+        controller.cancel("jump")
+        self.assertFalse(controller.is_active("jump"))
+        with self.assertRaises(ValueError):
+            controller.do("fly")
+
+    def test_shared_action_set(self):
+        action_set = ActionSet(["walk", "attack"])
+        first = ActionController(action_set)
+        second = ActionController(action_set)
+        first.add_action("attack", {})
+        second.add_action("attack", {})
+        second.add_action("walk", {})
+        attack = action_set["attack"]
+        first.do_id(attack)
+        self.assertTrue(first.is_active_id(attack))
+        self.assertFalse(second.is_active_id(attack))
+        with self.assertRaises(ValueError):
+            first.do("walk")
+
 class TestTextMenu(unittest.TestCase):
     def test_game_menu_selector(self):
         gamemenu = TextMenu()
@@ -0,0 +1,93 @@
+import os
+import unittest
+from unittest import mock
+
+import pygame
+
+from mergic.presenter import DisplayPresenter, Sdl2Presenter
+
+
+class TestDisplayPresenter(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"SDL_VIDEODRIVER": "dummy"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pygame.display.init()
+        self.addCleanup(pygame.display.quit)
+        self.presenter = DisplayPresenter((64, 32))
+        self.screen = pygame.Surface((32, 16))
+
+    def test_dirty_rects_are_scaled(self):
+        self.screen.fill((255, 0, 0), (2, 2, 4, 4))
+        with mock.patch("pygame.display.update") as update, mock.patch(
+            "pygame.display.flip"
+        ) as flip:
+            self.presenter.present(
+                self.screen, [pygame.Rect(2, 2, 4, 4), pygame.Rect(30, 15, 5, 5)]
+            )
+        flip.assert_not_called()
+        self.assertEqual(
+            update.call_args.args[0],
+            [pygame.Rect(4, 4, 8, 8), pygame.Rect(60, 30, 4, 2)],
+        )
+        display = self.presenter.display
+        self.assertEqual(display.get_at((4, 4)), pygame.Color(255, 0, 0))
+        self.assertEqual(display.get_at((11, 11)), pygame.Color(255, 0, 0))
+        self.assertEqual(display.get_at((12, 12)), pygame.Color(0, 0, 0))
+
+    def test_full_flip_fallback(self):
+        self.screen.fill((0, 255, 0))
+        for dirty_rects in (None, [pygame.Rect(0, 0, 30, 16)]):
+            with mock.patch("pygame.display.flip") as flip:
+                self.presenter.present(self.screen, dirty_rects)
+            flip.assert_called_once()
+        self.assertEqual(
+            self.presenter.display.get_at((63, 31)), pygame.Color(0, 255, 0)
+        )
+
+    def test_non_integer_scale_presents_full_screen(self):
+        screen = pygame.Surface((48, 16))
+        with mock.patch("pygame.display.update") as update, mock.patch(
+            "pygame.display.flip"
+        ) as flip:
+            self.presenter.present(screen, [pygame.Rect(0, 0, 2, 2)])
+        update.assert_not_called()
+        flip.assert_called_once()
+
+    def test_nothing_dirty(self):
+        with mock.patch("pygame.display.update") as update, mock.patch(
+            "pygame.display.flip"
+        ) as flip:
+            self.presenter.present(self.screen, [pygame.Rect(40, 40, 2, 2)])
+        update.assert_not_called()
+        flip.assert_not_called()
+
+
+class TestSdl2Presenter(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"SDL_VIDEODRIVER": "dummy"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pygame.display.init()
+        self.addCleanup(pygame.display.quit)
+        self.presenter = Sdl2Presenter((100, 50), software=True)
+        self.addCleanup(self.presenter.close)
+        self.screen = pygame.Surface((32, 16))
+
+    def test_integer_scaling(self):
+        self.assertEqual(self.presenter._target_rect((32, 16)), pygame.Rect(2, 1, 96, 48))
+        self.presenter.integer_scaling = False
+        self.assertEqual(self.presenter._target_rect((32, 16)), pygame.Rect(0, 0, 100, 50))
+
+    def test_present(self):
+        self.screen.fill((255, 0, 0))
+        self.presenter.present(self.screen, [pygame.Rect(0, 0, 2, 2)])
+        renderer = self.presenter.renderer
+        self.presenter.renderer = mock.Mock(wraps=renderer)
+        self.presenter.present(self.screen, [pygame.Rect(1, 1, 2, 2)])
+        self.presenter.present(self.screen, [])
+        self.assertEqual(self.presenter.renderer.present.call_count, 1)
+        self.presenter.renderer = renderer
+        self.assertEqual(self.presenter.texture.width, 32)
+        self.presenter.present(pygame.Surface((16, 8)))
+        self.assertEqual(self.presenter.texture.width, 16)
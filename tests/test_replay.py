@@ -0,0 +1,73 @@
+import csv
+from pathlib import Path
+import tempfile
+import unittest
+
+import pygame
+
+from mergic import Scene, SceneManager
+from mergic.mainloop_template import replay_mainloop
+from mergic.replay import InputRecorder, load_recording, replay
+
+
+class LoggingScene(Scene):
+    def setup(self):
+        self.manager.input.bind_key("right", pygame.K_RIGHT)
+        self.log = []
+
+    def handle_event(self, event):
+        self.log.append(("event", event.type, event.dict.get("key")))
+
+    def update(self, dt):
+        self.log.append(("update", dt, tuple(self.manager.input.snapshot.held)))
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.recording = Path(self.tmpdir.name) / "input.jsonl"
+        with InputRecorder(self.recording) as recorder:
+            recorder.record_frame(0, [])
+            recorder.record_frame(
+                16,
+                [
+                    pygame.event.Event(
+                        pygame.KEYDOWN, key=pygame.K_RIGHT, mod=0, window=object()
+                    ),
+                    pygame.event.Event(pygame.MOUSEMOTION, pos=(3, 4), rel=(1, 1)),
+                ],
+                [pygame.K_RIGHT],
+            )
+            recorder.record_frame(17, [], [pygame.K_RIGHT])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_load_recording(self):
+        frames = load_recording(self.recording)
+        self.assertEqual([frame.dt for frame in frames], [0, 16, 17])
+        keydown, motion = frames[1].events
+        self.assertEqual(keydown.dict, {"key": pygame.K_RIGHT, "mod": 0})
+        self.assertEqual(motion.pos, (3, 4))
+        self.assertEqual(frames[2].pressed_keys, {pygame.K_RIGHT})
+
+    def test_replay_is_deterministic(self):
+        logs = []
+        for _ in range(2):
+            scene = LoggingScene()
+            scene_manager = SceneManager({"main": scene})
+            timings = replay(scene_manager, load_recording(self.recording))
+            self.assertEqual(len(timings), 3)
+            logs.append(scene.log)
+        self.assertEqual(logs[0], logs[1])
+        self.assertEqual(logs[0][-1], ("update", 17, ("right",)))
+
+    def test_replay_mainloop_writes_timings(self):
+        timings_path = Path(self.tmpdir.name) / "timings.csv"
+        timings = replay_mainloop(
+            {"main": LoggingScene()}, self.recording, (32, 32), timings_path=timings_path
+        )
+        with open(timings_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([int(row["frame"]) for row in rows], [0, 1, 2])
+        self.assertEqual(int(rows[1]["update_ns"]), timings[1].update_ns)
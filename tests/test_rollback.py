@@ -0,0 +1,164 @@
+import unittest
+from unittest import mock
+
+import pygame
+from pygame.math import Vector2
+
+from mergic import GameWorld
+from mergic.rollback import RollbackBuffer
+from tests.test_mergic import DummyEntity, DummyMovable, DummyMovableEntity
+from tests.test_snapshot import DummySpriteEntity
+
+
+def move_all(world: GameWorld, dt):
+    for entity in world.entities_for_type(DummyMovableEntity):
+        entity.pos += entity.vel * dt
+        world.mark_changed(entity, DummyMovable)
+
+
+class TestRollbackBuffer(unittest.TestCase):
+    def test_restore_replays_deterministically(self):
+        world = GameWorld()
+        mover = DummyMovableEntity(pos=Vector2(0, 0), vel=Vector2(1, 0))
+        world.add(mover)
+        static_handle = world.add(DummyEntity())
+        rollback = RollbackBuffer(world, capacity=10)
+        positions = {}
+        for _ in range(5):
+            move_all(world, 1)
+            world.advance_tick()
+            rollback.record()
+            positions[world.tick] = Vector2(mover.pos)
+        self.assertEqual(len(rollback.deltas[-1].changed), 1)
+        world.delete_now(world.entity_for_handle(static_handle))
+        world.add(DummyEntity())
+        rollback.restore(2)
+        self.assertEqual(world.tick, 2)
+        self.assertEqual(rollback.ticks, [1, 2])
+        self.assertEqual(mover.pos, positions[2])
+        self.assertTrue(world.is_alive(static_handle))
+        self.assertEqual(len(world.entities[DummyEntity]), 1)
+        for _ in range(3):
+            move_all(world, 1)
+            world.advance_tick()
+            rollback.record()
+            self.assertEqual(mover.pos, positions[world.tick])
+
+    def test_capacity_and_shared_surfaces(self):
+        world = GameWorld()
+        surface = pygame.Surface((2, 2))
+        entity = DummySpriteEntity(pos=Vector2(), vel=Vector2(), surface=surface)
+        world.add(entity)
+        rollback = RollbackBuffer(world, capacity=3)
+        for tick in range(1, 7):
+            entity.pos.x = tick
+            world.mark_changed(entity, DummyMovable)
+            rollback.record(tick)
+        self.assertEqual(rollback.ticks, [4, 5, 6])
+        with self.assertRaises(ValueError):
+            rollback.restore(3)
+        rollback.restore(4)
+        self.assertEqual(entity.pos.x, 4)
+        self.assertIs(entity.surface, surface)
+
+    def test_untracked_restore_reverts_unflagged_changes(self):
+        world = GameWorld()
+        mover = DummyMovableEntity(pos=Vector2(0, 0), vel=Vector2(0, 0))
+        world.add(mover)
+        rollback = RollbackBuffer(world, tracked_components=None)
+        rollback.record(0)
+        mover.pos.x = 3
+        rollback.restore(0)
+        self.assertEqual(mover.pos.x, 0)
+        rollback.record(1)
+        mover.vel.y = 5
+        rollback.record(2)
+        mover.vel.y = 7
+        rollback.restore(0)
+        self.assertEqual(mover.vel.y, 0)
+
+    def test_tracked_components_only_pickle_flagged_entities(self):
+        world = GameWorld()
+        movers = [
+            DummyMovableEntity(pos=Vector2(i, 0), vel=Vector2(0, 0)) for i in range(3)
+        ]
+        world.add_many(movers)
+        rollback = RollbackBuffer(world, tracked_components=(DummyMovable,))
+        rollback.record()
+        self.assertEqual(len(rollback.deltas[-1].changed), 3)
+        world.advance_tick()
+        rollback.record()
+        world.advance_tick()
+        movers[0].pos.y = 1
+        world.mark_changed(movers[0], DummyMovable)
+        movers[1].pos.y = 1  # not flagged, so not recorded
+        added_handle = world.add(DummyEntity())
+        with mock.patch.object(
+            rollback, "_pickle_entity", wraps=rollback._pickle_entity
+        ) as pickle_entity:
+            rollback.record()
+        self.assertEqual(pickle_entity.call_count, 2)
+        self.assertEqual(
+            set(rollback.deltas[-1].changed),
+            {world.handle_for(movers[0]), added_handle},
+        )
+        world.advance_tick()
+        movers[2].pos.y = 5
+        world.mark_changed(movers[2], DummyMovable)
+        rollback.restore(1)
+        self.assertEqual([mover.pos.y for mover in movers], [0, 1, 0])
+        self.assertFalse(world.is_alive(added_handle))
+
+    def test_record_and_restore_only_visit_changed_entities(self):
+        world = GameWorld()
+        movers = [
+            DummyMovableEntity(pos=Vector2(i, 0), vel=Vector2(0, 0))
+            for i in range(50_000)
+        ]
+        handles = world.add_many(movers)
+        rollback = RollbackBuffer(world, capacity=10)
+        world.advance_tick()
+        rollback.record()
+        for tick in range(2, 5):
+            for mover in movers[tick * 100 : (tick + 1) * 100]:
+                mover.pos.y = tick
+                world.mark_changed(mover, DummyMovable)
+            world.delete_now(movers[tick])
+            world.add(DummyEntity())
+            world.advance_tick()
+            with (
+                mock.patch.object(
+                    world, "entities_with_handles", side_effect=AssertionError
+                ),
+                mock.patch.object(
+                    rollback, "_pickle_entity", wraps=rollback._pickle_entity
+                ) as pickle_entity,
+            ):
+                rollback.record()
+            self.assertLessEqual(pickle_entity.call_count, 102)
+            self.assertEqual(len(rollback.deltas[-1].changed), 101)
+            self.assertEqual(rollback.deltas[-1].deleted, {handles[tick]})
+        with (
+            mock.patch.object(
+                world, "entities_with_handles", side_effect=AssertionError
+            ),
+            mock.patch.object(
+                rollback, "_pickle_entity", wraps=rollback._pickle_entity
+            ) as pickle_entity,
+        ):
+            rollback.restore(2)
+        self.assertLessEqual(pickle_entity.call_count, 2 * 102)
+        self.assertEqual(rollback.ticks, [1, 2])
+        self.assertEqual(movers[300].pos.y, 0)
+        self.assertEqual(movers[200].pos.y, 2)
+        self.assertTrue(world.is_alive(handles[3]))
+        self.assertFalse(world.is_alive(handles[2]))
+        self.assertEqual(len(world.entities[DummyEntity]), 1)
+        self.assertEqual(rollback.state_at(2), {
+            handle: rollback._pickle_entity(entity)
+            for handle, entity in world.entities_with_handles()
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import threading
+import unittest
+
+import pygame
+
+from mergic import Scene, SceneManager
+
+
+class LoggingScene(Scene):
+    def __init__(self, name, log, release_preload=None):
+        super().__init__()
+        self.name = name
+        self.log = log
+        self.release_preload = release_preload
+        self.preload_thread = None
+
+    def preload(self, report_progress):
+        self.preload_thread = threading.current_thread()
+        report_progress(0.5)
+        if self.release_preload is not None:
+            self.release_preload.wait(5)
+        self.log.append(("preload", self.name))
+
+    def setup(self):
+        self.log.append(("setup", self.name))
+
+    def cleanup(self):
+        self.log.append(("cleanup", self.name))
+
+    def update(self, dt):
+        self.log.append(("update", self.name))
+
+
+class TestSceneManager(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.release_preload = threading.Event()
+        self.scene_manager = SceneManager(
+            {
+                "title": LoggingScene("title", self.log),
+                "game": LoggingScene("game", self.log, self.release_preload),
+            }
+        )
+        self.addCleanup(self.scene_manager.shutdown)
+
+    def test_change_scene_waits_for_preload(self):
+        self.scene_manager.update(0)
+        self.release_preload.set()
+        self.scene_manager.scenes["title"].change_scene("game")
+        self.assertEqual(self.scene_manager.current_scene, "game")
+        self.assertEqual(
+            self.log,
+            [
+                ("preload", "title"),
+                ("setup", "title"),
+                ("update", "title"),
+                ("cleanup", "title"),
+                ("preload", "game"),
+                ("setup", "game"),
+            ],
+        )
+        self.assertIs(
+            self.scene_manager.scenes["game"].preload_thread, threading.main_thread()
+        )
+
+    def test_non_blocking_change_scene(self):
+        self.scene_manager.update(0)
+        self.scene_manager.change_scene("game", wait=False)
+        scene_preload = self.scene_manager.preloads["game"]
+        self.scene_manager.update(0)
+        self.scene_manager.update(0)
+        self.assertEqual(self.scene_manager.current_scene, "title")
+        self.assertFalse(scene_preload.done)
+        self.assertEqual(scene_preload.progress, 0.5)
+        self.release_preload.set()
+        scene_preload.wait()
+        self.assertEqual(scene_preload.progress, 1.0)
+        self.scene_manager.update(0)
+        self.assertEqual(self.scene_manager.current_scene, "game")
+        self.assertIsNot(
+            self.scene_manager.scenes["game"].preload_thread, threading.main_thread()
+        )
+        self.assertEqual(
+            self.log[-5:],
+            [
+                ("update", "title"),
+                ("preload", "game"),
+                ("cleanup", "title"),
+                ("setup", "game"),
+                ("update", "game"),
+            ],
+        )
+
+    def test_preload_error_is_raised_on_switch(self):
+        def failing_preload(report_progress):
+            raise OSError("missing asset")
+
+        self.scene_manager.scenes["game"].preload = failing_preload
+        self.scene_manager.change_scene("game", wait=False)
+        self.scene_manager.preloads["game"].future.exception(5)
+        with self.assertRaises(OSError):
+            self.scene_manager.update(0)
+
+
+class SurfaceScene(LoggingScene):
+    def setup(self):
+        super().setup()
+        self.background = pygame.Surface((10, 10), depth=32)
+
+    def cleanup(self):
+        super().cleanup()
+        del self.background
+
+
+class TestSceneStack(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.scene_manager = SceneManager(
+            {
+                name: SurfaceScene(name, self.log)
+                for name in ("field", "battle", "pause")
+            }
+        )
+        self.scene_manager.update(0)
+        self.log.clear()
+
+    def test_push_and_pop_keep_suspended_state(self):
+        field = self.scene_manager.scenes["field"]
+        background = field.background
+        self.scene_manager.push_scene("pause")
+        self.assertEqual(self.scene_manager.current_scene, "pause")
+        with self.assertRaises(ValueError):
+            self.scene_manager.push_scene("field")
+        self.scene_manager.update(16)
+        self.scene_manager.pop_scene()
+        self.assertEqual(self.scene_manager.current_scene, "field")
+        self.assertIs(field.background, background)
+        self.assertEqual(
+            self.log,
+            [
+                ("preload", "pause"),
+                ("setup", "pause"),
+                ("update", "pause"),
+                ("cleanup", "pause"),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            self.scene_manager.pop_scene()
+
+    def test_suspended_update_interval(self):
+        dts = []
+        self.scene_manager.scenes["field"].update = dts.append
+        self.scene_manager.push_scene("pause", suspended_update_interval=2)
+        for dt in (10, 11, 12, 13, 14):
+            self.scene_manager.update(dt)
+        self.assertEqual(dts, [21, 25])
+
+    def test_memory_budget_evicts_least_recently_active(self):
+        scene_bytes = self.scene_manager.scenes["field"].memory_usage()
+        self.assertEqual(scene_bytes, 400)
+        self.scene_manager.memory_budget = scene_bytes
+        self.scene_manager.push_scene("battle")
+        self.scene_manager.push_scene("pause")
+        self.assertEqual(
+            [(s.name, s.evicted) for s in self.scene_manager.scene_stack],
+            [("field", True), ("battle", False)],
+        )
+        self.assertEqual(self.scene_manager.suspended_memory_usage(), scene_bytes)
+        self.scene_manager.pop_scene()
+        self.scene_manager.pop_scene()
+        self.assertEqual(self.scene_manager.current_scene, "field")
+        self.assertEqual(
+            self.log[-4:],
+            [
+                ("cleanup", "pause"),
+                ("cleanup", "battle"),
+                ("preload", "field"),
+                ("setup", "field"),
+            ],
+        )
+
+    def test_take_dirty_rects(self):
+        field = self.scene_manager.scenes["field"]
+        field.take_dirty_rects = lambda: [pygame.Rect(0, 0, 1, 1)]
+        self.assertIsNone(self.scene_manager.take_dirty_rects())
+        self.assertEqual(
+            self.scene_manager.take_dirty_rects(), [pygame.Rect(0, 0, 1, 1)]
+        )
+        self.scene_manager.push_scene("pause", suspended_update_interval=1)
+        pause = self.scene_manager.scenes["pause"]
+        pause.take_dirty_rects = lambda: [pygame.Rect(1, 1, 1, 1)]
+        self.assertIsNone(self.scene_manager.take_dirty_rects())
+        self.assertEqual(
+            self.scene_manager.take_dirty_rects(),
+            [pygame.Rect(0, 0, 1, 1), pygame.Rect(1, 1, 1, 1)],
+        )
+        del field.take_dirty_rects
+        self.assertIsNone(self.scene_manager.take_dirty_rects())
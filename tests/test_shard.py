@@ -0,0 +1,108 @@
+import os
+import unittest
+
+from pygame.math import Vector2
+
+from mergic import GameWorld
+from mergic.gamemap import TileMap
+from mergic.shard import MapShards, ShardSystem
+from tests.test_mergic import DummyEntity, DummyMovable, DummyMovableEntity
+
+
+def move(world: GameWorld, dt):
+    for entity in world.entities_for_components(DummyMovable):
+        entity.pos += entity.vel * dt
+    for event in world.inbox:
+        world.post_event(("echo", event))
+
+
+def crash(world: GameWorld, dt):
+    os._exit(3)
+
+
+def count_movables(world: GameWorld):
+    return len(list(world.entities_for_components(DummyMovable)))
+
+
+class TestMapShards(unittest.TestCase):
+    def test_offload_tick_and_reclaim(self):
+        world = GameWorld()
+        world.set_map("town", TileMap(width=4, height=4))
+        town_entities = [
+            DummyMovableEntity(pos=Vector2(0, 0), vel=Vector2(1, 0)) for _ in range(2)
+        ]
+        world.add_many(town_entities)
+        world.add(DummyEntity())
+        shards = MapShards(world)
+        try:
+            shards.offload(
+                "town",
+                town_entities,
+                systems=[ShardSystem("move", move, writes=(DummyMovable,))],
+                summarize=count_movables,
+            )
+            self.assertNotIn("town", world.maps)
+            self.assertEqual(len(world.entities[DummyMovableEntity]), 0)
+            shards.send_event("town", "hello")
+            self.assertEqual(shards.tick(2), [])
+            (report,) = shards.collect(timeout=5)
+            self.assertEqual((report.map_name, report.tick, report.summary), ("town", 1, 2))
+            self.assertEqual(report.events, [("echo", "hello")])
+            shards.tick(1)
+            self.assertEqual(shards.collect(timeout=5)[0].events, [])
+            handles = shards.reclaim("town")
+        finally:
+            shards.close()
+        self.assertIn("town", world.maps)
+        self.assertEqual(
+            [world.entity_for_handle(handle).pos for handle in handles],
+            [Vector2(3, 0), Vector2(3, 0)],
+        )
+
+    def test_offload_unknown_map_keeps_entities(self):
+        world = GameWorld()
+        entity = DummyMovableEntity(pos=Vector2(0, 0), vel=Vector2(1, 0))
+        handle = world.add(entity)
+        shards = MapShards(world)
+        with self.assertRaises(KeyError):
+            shards.offload("nowhere", [entity])
+        self.assertTrue(world.is_alive(handle))
+        self.assertEqual(shards.shards, {})
+
+    def test_offload_validates_entities_first(self):
+        world = GameWorld()
+        world.set_map("town", TileMap(width=4, height=4))
+        entity = DummyMovableEntity(pos=Vector2(0, 0), vel=Vector2(1, 0))
+        handle = world.add(entity)
+        doomed = DummyEntity()
+        world.add(doomed)
+        world.reserve_to_delete(doomed)
+        shards = MapShards(world)
+        with self.assertRaises(ValueError):
+            shards.offload("town", [entity, DummyMovableEntity(Vector2(), Vector2())])
+        self.assertIn("town", world.maps)
+        self.assertTrue(world.is_alive(handle))
+        try:
+            shards.offload("town", [entity])
+        finally:
+            shards.close()
+        self.assertFalse(world.is_alive(handle))
+        self.assertEqual(list(world.commands.deletes.values()), [doomed])
+        self.assertEqual(list(world.entities_for_type(DummyEntity)), [doomed])
+
+    def test_dead_worker(self):
+        world = GameWorld()
+        world.set_map("town", TileMap(width=4, height=4))
+        shards = MapShards(world)
+        try:
+            shards.offload("town", [], systems=[ShardSystem("crash", crash)])
+            shards.tick(1)
+            self.assertEqual(shards.collect(timeout=5), [])
+            self.assertEqual(shards.failed, {"town": 3})
+            self.assertEqual(shards.tick(1), [])
+        finally:
+            shards.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
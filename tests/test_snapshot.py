@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+import importlib.util
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import time
+import unittest
+
+import pygame
+from pygame.math import Vector2
+
+from mergic import GameWorld
+from mergic.gamemap import TileMap
+from mergic import snapshot
+from mergic.replay import InputRecorder
+from tests.test_mergic import DummyMovable, DummyMovableEntity
+
+
+TRUSTED_MODULES = ("tests",)
+
+
+class Exploit:
+    def __reduce__(self):
+        return os.system, ("echo unsafe",)
+
+
+class Reducing:
+    """Pickles as a call of `callable(*args)`."""
+
+    def __init__(self, callable, *args):
+        self.callable = callable
+        self.args = args
+
+    def __reduce__(self):
+        return self.callable, self.args
+
+
+class Touching:
+    def __init__(self, filepath):
+        Path(filepath).write_text("touched")
+
+
+@dataclass(slots=True)
+class DummyFollower:
+    target: object
+
+
+@dataclass
+class DummySprite:
+    surface: pygame.Surface
+
+
+@dataclass(slots=True)
+class DummySpriteEntity(DummyMovable, DummySprite):
+    pass
+
+
+class TestSnapshot(unittest.TestCase):
+    def build_world(self):
+        world = GameWorld()
+        surface = pygame.Surface((4, 4), pygame.SRCALPHA)
+        surface.fill((255, 0, 0, 128))
+        handles = world.add_many(
+            DummySpriteEntity(pos=Vector2(i, 0), vel=Vector2(), surface=surface)
+            for i in range(3)
+        )
+        world.delete_now(world.entity_for_handle(handles[1]))
+        tilemap = TileMap(width=4, height=4)
+        tilemap.paint_terrain("ground", 1, 2, "grass")
+        world.set_map("field", tilemap)
+        return world, handles
+
+    def test_dumps_and_loads(self):
+        world, handles = self.build_world()
+        restored = snapshot.loads(snapshot.dumps(world), TRUSTED_MODULES)
+        self.assertIsInstance(restored, GameWorld)
+        self.assertFalse(restored.is_alive(handles[1]))
+        first = restored.entity_for_handle(handles[0])
+        last = restored.entity_for_handle(handles[2])
+        self.assertEqual((first.pos, last.pos), (Vector2(0, 0), Vector2(2, 0)))
+        self.assertIs(first.surface, last.surface)
+        self.assertEqual(first.surface.get_at((0, 0)), pygame.Color(255, 0, 0, 128))
+        self.assertEqual(restored.maps["field"].terrain_layers["ground"][1, 2], "grass")
+        self.assertNotEqual(restored.add(DummyMovableEntity(Vector2(), Vector2())), handles[1])
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "requires numpy")
+    def test_numeric_components(self):
+        world, handles = self.build_world()
+        world.declare_numeric_components(DummyMovable, pos=2)
+        restored = snapshot.loads(snapshot.dumps(world), TRUSTED_MODULES)
+        for arrays in restored.component_arrays(DummyMovable):
+            arrays["pos"] += 1
+        self.assertEqual(list(restored.entity_for_handle(handles[2]).pos), [3, 1])
+        self.assertEqual(list(world.entity_for_handle(handles[2]).pos), [2, 0])
+
+    def test_loads_rejects_untrusted_globals(self):
+        payload = snapshot.encode(pickle.dumps(Exploit()))
+        with self.assertRaises(pickle.UnpicklingError):
+            snapshot.loads(payload, TRUSTED_MODULES)
+        world, _ = self.build_world()
+        with self.assertRaises(pickle.UnpicklingError):
+            snapshot.loads(snapshot.dumps(world))
+
+    def test_loads_never_calls_constructors(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            victim = Path(tmpdir) / "victim.txt"
+            victim.write_text("precious")
+            for payload in (
+                Reducing(InputRecorder, str(victim)),
+                Reducing(TileMap, 4, 4),
+                Reducing(Touching, str(victim)),
+            ):
+                with self.assertRaises(pickle.UnpicklingError):
+                    snapshot.loads(
+                        snapshot.encode(pickle.dumps(payload)), TRUSTED_MODULES
+                    )
+            self.assertEqual(victim.read_text(), "precious")
+
+    def test_entity_references_keep_identity(self):
+        world, handles = self.build_world()
+        target = world.entity_for_handle(handles[2])
+        follower_handle = world.add(DummyFollower(target))
+        restored = snapshot.loads(snapshot.dumps(world), TRUSTED_MODULES)
+        self.assertIs(
+            restored.entity_for_handle(follower_handle).target,
+            restored.entity_for_handle(handles[2]),
+        )
+
+    def test_save_and_load(self):
+        world, handles = self.build_world()
+        for fork in (True, False):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filepath = Path(tmpdir) / "quicksave.mgsn"
+                snapshot.save(world, filepath, fork=fork).join()
+                restored = snapshot.load(filepath, TRUSTED_MODULES)
+            self.assertEqual(len(restored.entities[DummySpriteEntity]), 2)
+
+    def test_quick_save_of_many_entities(self):
+        world = GameWorld()
+        handles = world.add_many(
+            DummyMovableEntity(pos=Vector2(i, 0), vel=Vector2(1, 1))
+            for i in range(50_000)
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = Path(tmpdir) / "quicksave.mgsn"
+            start = time.perf_counter()
+            thread = snapshot.save(world, filepath)
+            elapsed = time.perf_counter() - start
+            world.entity_for_handle(handles[-1]).pos.x = -1
+            thread.join()
+            restored = snapshot.load(filepath, TRUSTED_MODULES)
+        # Two 60 FPS frames; pickling every entity on the caller took over 300 ms.
+        self.assertLess(elapsed, 2 / 60)
+        self.assertEqual(restored.entity_for_handle(handles[-1]).pos, Vector2(49_999, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import random
+import unittest
+
+from pygame.math import Vector2
+
+from mergic import GameWorld
+from mergic.spatial import SpatialHash
+from tests.test_mergic import DummyEntity, DummyMovableEntity
+
+
+class TestSpatialHash(unittest.TestCase):
+    def test_query_rect_and_radius(self):
+        spatial_hash = SpatialHash(16)
+        entities = {name: object() for name in "abcd"}
+        spatial_hash.insert(entities["a"], (0, 0))
+        spatial_hash.insert(entities["b"], (15, 15))
+        spatial_hash.insert(entities["c"], (40, 0))
+        spatial_hash.insert(entities["d"], (-20, -5))
+        self.assertCountEqual(
+            spatial_hash.query_rect((0, 0, 16, 16)), [entities["a"], entities["b"]]
+        )
+        self.assertCountEqual(
+            spatial_hash.query_radius((0, 0), 22), [entities["a"], entities["b"], entities["d"]]
+        )
+        spatial_hash.move(entities["c"], (8, 8))
+        spatial_hash.remove(entities["a"])
+        self.assertCountEqual(
+            spatial_hash.query_rect((0, 0, 16, 16)), [entities["b"], entities["c"]]
+        )
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(0)
+        spatial_hash = SpatialHash(10)
+        positions = {}
+        for _ in range(300):
+            entity = object()
+            positions[entity] = (rng.uniform(-200, 200), rng.uniform(-200, 200))
+            spatial_hash.insert(entity, positions[entity])
+        for _ in range(20):
+            point = (rng.uniform(-250, 250), rng.uniform(-250, 250))
+            expected = sorted(
+                positions,
+                key=lambda entity: (positions[entity][0] - point[0]) ** 2
+                + (positions[entity][1] - point[1]) ** 2,
+            )[:5]
+            self.assertEqual(spatial_hash.nearest(point, 5), expected)
+
+    def test_nearest_far_from_occupied_cells(self):
+        spatial_hash = SpatialHash(1)
+        near, far = object(), object()
+        spatial_hash.insert(near, (0, 0))
+        spatial_hash.insert(far, (3, 4))
+        point = (100_000, 0)
+        self.assertEqual(spatial_hash.nearest(point, 2), [far, near])
+        self.assertEqual(spatial_hash.nearest(point, 1, max_distance=10), [])
+        self.assertEqual(spatial_hash.nearest((3, 9), 1, max_distance=5), [far])
+
+
+class TestGameWorldSpatialIndex(unittest.TestCase):
+    def test_spatial_index_follows_world(self):
+        world = GameWorld()
+        near = DummyMovableEntity(pos=Vector2(1, 1), vel=Vector2())
+        far = DummyMovableEntity(pos=Vector2(100, 100), vel=Vector2())
+        world.add(near)
+        world.enable_spatial_index(32)
+        world.add_many([far, DummyEntity()])
+        self.assertEqual(len(world.spatial_index), 2)
+        self.assertEqual(world.spatial_index.query_radius((0, 0), 10), [near])
+        world.move(far, (2, 2))
+        self.assertEqual(far.pos, Vector2(2, 2))
+        near.pos.update(200, 200)
+        world.sync_spatial_index([near])
+        self.assertEqual(world.spatial_index.query_radius((0, 0), 10), [far])
+        world.reserve_to_delete(far)
+        world.do_reserved_deletions()
+        self.assertEqual(world.spatial_index.nearest((0, 0)), [near])
+
+
+if __name__ == "__main__":
+    unittest.main()
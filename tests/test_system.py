@@ -0,0 +1,55 @@
+import unittest
+
+from mergic import GameWorld
+from mergic.system import SystemScheduler
+
+
+class Position:
+    pass
+
+
+class Velocity:
+    pass
+
+
+class Sprite:
+    pass
+
+
+class TestSystemScheduler(unittest.TestCase):
+    def test_schedule_groups_non_conflicting_systems(self):
+        scheduler = SystemScheduler(max_workers=1)
+        scheduler.add("input", lambda world, dt: None, writes=(Velocity,))
+        scheduler.add("animation", lambda world, dt: None, writes=(Sprite,))
+        scheduler.add(
+            "movement", lambda world, dt: None, reads=(Velocity,), writes=(Position,)
+        )
+        scheduler.add("render", lambda world, dt: None, reads=(Position, Sprite))
+        self.assertEqual(
+            scheduler.schedule(), [["input", "animation"], ["movement"], ["render"]]
+        )
+
+    def test_run_keeps_order_of_conflicting_systems(self):
+        for max_workers in (1, 4):
+            world = GameWorld()
+            world.systems = SystemScheduler(max_workers=max_workers)
+            calls = []
+            world.add_system(
+                "first", lambda world, dt: calls.append(("first", dt)), writes=(Position,)
+            )
+            world.add_system(
+                "second", lambda world, dt: calls.append(("second", dt)), reads=(Position,)
+            )
+            world.run_systems(16)
+            world.systems.shutdown()
+            self.assertEqual(calls, [("first", 16), ("second", 16)])
+
+    def test_add_duplicated_name(self):
+        scheduler = SystemScheduler()
+        scheduler.add("system", lambda world, dt: None)
+        with self.assertRaises(ValueError):
+            scheduler.add("system", lambda world, dt: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import csv
+import json
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+import warnings
+
+from mergic import Scene
+from mergic.telemetry import FrameTelemetry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, milliseconds):
+        self.now += int(milliseconds * 1_000_000)
+
+
+class TestFrameTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("mergic.telemetry.time.perf_counter_ns", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record_frame(self, telemetry, events_ms, update_ms, idle_ms=0):
+        telemetry.begin_frame()
+        self.clock.advance(events_ms)
+        telemetry.lap("events")
+        self.clock.advance(update_ms)
+        telemetry.lap("update")
+        self.clock.advance(idle_ms)
+        telemetry.end_frame()
+
+    def test_ring_buffer_and_summary(self):
+        telemetry = FrameTelemetry(capacity=4, hitch_threshold_ms=20)
+        for update_ms in (1, 2, 3, 50, 5, 6):
+            self.record_frame(telemetry, 1, update_ms)
+        self.assertEqual(len(telemetry), 4)
+        self.assertEqual(telemetry.frame_count, 6)
+        self.assertEqual(
+            telemetry.samples("update"), [3_000_000, 50_000_000, 5_000_000, 6_000_000]
+        )
+        self.assertEqual(telemetry.samples("render"), [0, 0, 0, 0])
+        summary = telemetry.summary()
+        self.assertEqual(summary["update"]["p50"], 5)
+        self.assertEqual(summary["update"]["p99"], 50)
+        self.assertEqual(summary["frame"]["max"], 51)
+        self.assertEqual(summary["hitches"], {"buffered": 1, "total": 1})
+
+    def test_empty_summary(self):
+        telemetry = FrameTelemetry()
+        self.assertEqual(telemetry.summary()["update"], {})
+        self.assertEqual(telemetry.summary()["hitches"]["total"], 0)
+
+    def test_exports(self):
+        telemetry = FrameTelemetry(capacity=2)
+        for update_ms in (1, 2, 3):
+            self.record_frame(telemetry, 0, update_ms, idle_ms=10)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = Path(tmpdir) / "frames.csv"
+            json_path = Path(tmpdir) / "frames.json"
+            telemetry.write_csv(csv_path)
+            telemetry.write_json(json_path)
+            with open(csv_path, newline="") as f:
+                rows = list(csv.DictReader(f))
+            with open(json_path) as f:
+                data = json.load(f)
+        self.assertEqual([row["frame"] for row in rows], ["1", "2"])
+        self.assertEqual(rows[1]["update_ns"], "3000000")
+        self.assertEqual(rows[1]["frame_ns"], "13000000")
+        self.assertEqual(data["frame_count"], 3)
+        self.assertEqual(data["samples_ns"]["update"], [2_000_000, 3_000_000])
+
+    def test_print_clockinfo_is_deprecated(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            Scene.print_clockinfo(lambda self, dt: None)
+        self.assertTrue(issubclass(caught[0].category, DeprecationWarning))
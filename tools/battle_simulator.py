@@ -2,7 +2,7 @@ import random
 import typing
 from pygame import Vector2
 import pygame
-from mergic import ActionController, GameWorld
+from mergic import ActionController, GameWorld, Prefab
 from examples.wizhalen_old import combat_cli, wizard
 from examples.wizhalen_old.components import HP
 from examples.wizhalen_old.entities import Mob, Player
@@ -59,27 +59,38 @@ def main():
             student=None,
         )
     )
-    for i in range(random.randint(2, 4)):
-        world.add(
-            Mob(
-                mob_type="monster",
-                name=f"enemy{i}",
-                pos=Vector2(),
-                surface=pygame.surface.Surface((32, 32)),
-                vel=Vector2(),
-                actions=ActionController(),
-                hp=HP(max_=random.randint(11, 22)),
-                mana=Mana(max_=random.randint(39, 78)),
-                physical_ability=random.randint(5, 8),
-                friendly_factions={"enemy"},
-                hostile_factions={"player"},
-                friendly_mob_types=set,
-                hostile_mob_types=set(),
-                spell_database={},
-                status_effects=OwnedStatusEffects(),
-                resistances={},
-            )
-        )
+    world.register_prefab(
+        "monster",
+        Prefab(
+            Mob,
+            values={
+                "mob_type": "monster",
+                "surface": pygame.surface.Surface((32, 32)),
+            },
+            factories={
+                "pos": Vector2,
+                "vel": Vector2,
+                "actions": ActionController,
+                "friendly_factions": lambda: {"enemy"},
+                "hostile_factions": lambda: {"player"},
+                "friendly_mob_types": set,
+                "hostile_mob_types": set,
+                "spell_database": dict,
+                "status_effects": OwnedStatusEffects,
+                "resistances": dict,
+            },
+        ),
+    )
+    world.spawn(
+        "monster",
+        random.randint(2, 4),
+        overrides=lambda i: {
+            "name": f"enemy{i}",
+            "hp": HP(max_=random.randint(11, 22)),
+            "mana": Mana(max_=random.randint(39, 78)),
+            "physical_ability": random.randint(5, 8),
+        },
+    )
     combat_cli.CombatLoopCLI().run(
         units_on_battlefield=world.entities_for_components(
             *typing.get_args(combat.CombatUnit)